@@ -1,16 +1,27 @@
 import csv
+import functools
+import hashlib
 import io
+import json
+import operator
 import os
+import queue
+import re
+import shutil
 import sqlite3
+import tempfile
+import threading
+import time
 import zipfile
 import base64
 import urllib.request
 import urllib.error
 from datetime import datetime, timedelta
-from flask import Flask, request, redirect, url_for, render_template_string, Response, abort, session
+from flask import Flask, request, redirect, url_for, render_template, Response, stream_with_context, abort, session, g, has_app_context
 from email.message import EmailMessage
 import smtplib
 from flask import send_from_directory
+from flask.sessions import SecureCookieSessionInterface
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -21,12 +32,38 @@ APP = Flask(__name__)
 APP.secret_key = os.environ.get("PANTRY_SECRET_KEY", "dev-secret-change-me")
 
 
+class PlainJSONSerializer:
+    # The session only ever holds ints and strings, so Flask's tagged JSON
+    # (which walks every value looking for bytes/datetimes/etc.) isn't needed.
+    # Existing cookies decode unchanged: untagged values are plain JSON.
+    @staticmethod
+    def dumps(value):
+        return json.dumps(value, separators=(",", ":"))
+
+    @staticmethod
+    def loads(value):
+        return json.loads(value)
+
+
+class PlainJSONSessionInterface(SecureCookieSessionInterface):
+    serializer = PlainJSONSerializer()
+
+
+APP.session_interface = PlainJSONSessionInterface()
+
+
 # === LOCAL_UPLOAD_EMAIL_HELPERS_BEGIN ===
 
 # Where uploaded item images are stored (local dev)
 UPLOAD_FOLDER = os.environ.get("PANTRY_UPLOAD_FOLDER", os.path.join(os.path.dirname(__file__), "uploads"))
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Behind a server that honours X-Sendfile (Apache mod_xsendfile, lighttpd), let
+# it send upload bytes instead of the gunicorn worker. Off by default: a bare
+# deployment would serve empty responses with the header set. nginx ignores
+# X-Sendfile (it only acts on X-Accel-Redirect), so leave this off behind nginx.
+APP.config["USE_X_SENDFILE"] = os.environ.get("PANTRY_USE_X_SENDFILE", "0") == "1"
+
 ALLOWED_IMAGE_EXT = {"png", "jpg", "jpeg", "webp", "gif"}
 
 def allowed_image(filename: str) -> bool:
@@ -53,8 +90,8 @@ def save_uploaded_image(file_storage):
 
 @APP.route("/uploads/<path:filename>")
 def uploaded_file(filename):
-    # Serves uploaded images in local dev
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    # Serves uploaded images (handed to the proxy when USE_X_SENDFILE is on)
+    return send_from_directory(UPLOAD_FOLDER, filename, conditional=True)
 
 def send_email(to_email: str, subject: str, body: str):
     """
@@ -152,15 +189,58 @@ def set_setting_value(key: str, value: str) -> None:
 
 
 def parse_float(value: str | None) -> float | None:
+    # float() already ignores surrounding whitespace.
+    if not value:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_int(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def real_param(value: str | None) -> str | float | None:
+    # Plain decimal text is bound as-is and coerced by CAST(? AS REAL) in SQL;
+    # anything else goes through parse_float.
     if value is None:
         return None
     text = str(value).strip()
     if text == "":
         return None
+    digits = text[1:] if text.startswith("-") else text
+    if digits.isascii() and digits.replace(".", "", 1).isdigit():
+        return text
+    return parse_float(text)
+
+
+ZIP_COPY_BUFFER = 1 << 20
+
+
+def extract_zip_member(zf: zipfile.ZipFile, member: zipfile.ZipInfo, out_path: str) -> None:
+    # Stream into a temp file next to the target and swap it in, so a failed or
+    # interrupted restore never leaves a half-written image behind.
+    out_dir = os.path.dirname(out_path)
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".restore-")
     try:
-        return float(text)
-    except ValueError:
-        return None
+        # Wrap fd first so it is closed even if opening the member fails
+        with os.fdopen(fd, "wb") as dst:
+            with zf.open(member) as src:
+                shutil.copyfileobj(src, dst, ZIP_COPY_BUFFER)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 def safe_extract_zip(zf: zipfile.ZipFile, target_dir: str, allow_prefixes: tuple[str, ...]):
@@ -173,9 +253,7 @@ def safe_extract_zip(zf: zipfile.ZipFile, target_dir: str, allow_prefixes: tuple
         if not name.startswith(allow_prefixes):
             continue
         out_path = os.path.join(target_dir, name)
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
-        with zf.open(member) as src, open(out_path, "wb") as dst:
-            dst.write(src.read())
+        extract_zip_member(zf, member, out_path)
 
 
 def extract_uploads_zip(zf: zipfile.ZipFile) -> None:
@@ -194,9 +272,7 @@ def extract_uploads_zip(zf: zipfile.ZipFile) -> None:
             out_path = os.path.join(static_dir, rel_name)
         else:
             continue
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
-        with zf.open(member) as src, open(out_path, "wb") as dst:
-            dst.write(src.read())
+        extract_zip_member(zf, member, out_path)
 
 
 def to_csv_bytes(rows: list[list[str]]) -> bytes:
@@ -288,22 +364,115 @@ RENDER_MANAGER_USER = os.environ.get("PANTRY_RENDER_MANAGER_USER", "")
 RENDER_MANAGER_PASSWORD = os.environ.get("PANTRY_RENDER_MANAGER_PASSWORD", "")
 PANTRY_SYNC_TOKEN = os.environ.get("PANTRY_SYNC_TOKEN", "")
 
-_DB_READY = False
+# Secondary indexes, created by init_db. Member lookups (email OR phone) run per
+# imported request; the child-table ones back per-request / per-item lookups.
+INDEXES = {
+    "idx_members_email": "CREATE INDEX IF NOT EXISTS idx_members_email ON members(email)",
+    "idx_members_phone": "CREATE INDEX IF NOT EXISTS idx_members_phone ON members(phone)",
+    "idx_request_items_request": "CREATE INDEX IF NOT EXISTS idx_request_items_request ON request_items(request_id)",
+    "idx_stock_movements_item": "CREATE INDEX IF NOT EXISTS idx_stock_movements_item ON stock_movements(item_id)",
+    "idx_stock_movements_created": (
+        "CREATE INDEX IF NOT EXISTS idx_stock_movements_created ON stock_movements(created_at, movement_type)"
+    ),
+    "idx_items_expiry": "CREATE INDEX IF NOT EXISTS idx_items_expiry ON items(expiry_date)",
+    # Serves the member catalog and low-stock lookups (active items with qty > 0).
+    "idx_items_active_qty": (
+        "CREATE INDEX IF NOT EXISTS idx_items_active_qty ON items(qty_available) WHERE is_active=1"
+    ),
+    # Active items in name order, so catalog listings skip the sort.
+    "idx_items_active_name": (
+        "CREATE INDEX IF NOT EXISTS idx_items_active_name ON items(item_name) WHERE is_active=1"
+    ),
+}
+
+# Imports larger than this drop the indexes they don't read from and rebuild
+# them once at the end instead of updating them row by row.
+BULK_IMPORT_INDEX_THRESHOLD = 1000
+
+# Staged request lines are written with executemany in chunks of this size.
+IMPORT_BATCH_SIZE = 500
+
+CSV_READ_BUFFER = 1 << 20
+
+# Upper bound on qty_<item_id> lines in one member request; keeps the item_id
+# IN (...) list well under SQLite's bound-variable limit.
+MAX_REQUEST_LINES = 500
+
+# Id lists bound into "IN (?, ...)" are split into chunks of this size.
+IN_LIST_CHUNK = 500
+
+# UTC ISO-8601 timestamp computed by SQLite, same shape as datetime.isoformat().
+SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now')"
+
+# Request connections are kept open between requests instead of reopening the
+# file and replaying the pragmas each time.
+DB_POOL_SIZE = 8
 
 
 # ============================================================
 # DB helpers
 # ============================================================
+class RequestConnection(sqlite3.Connection):
+    # One connection is shared by every conn() call during a request. close()
+    # behaves like a real close for the outermost caller (uncommitted work is
+    # rolled back); the handle itself is released in _close_request_db.
+    depth = 0
+
+    def close(self):
+        self.depth = max(self.depth - 1, 0)
+        if self.depth == 0 and self.in_transaction:
+            self.rollback()
+
+    def release(self):
+        if self.in_transaction:
+            self.rollback()
+        self.depth = 0
+        try:
+            _DB_POOL.put_nowait(self)
+        except queue.Full:
+            super().close()
+
+
+_DB_POOL = queue.Queue(maxsize=DB_POOL_SIZE)
+
+
 def conn():
-    c = sqlite3.connect(DB)
+    if has_app_context():
+        c = g.get("db")
+        if c is None:
+            try:
+                c = _DB_POOL.get_nowait()
+            except queue.Empty:
+                c = open_db(RequestConnection)
+            g.db = c
+        c.depth += 1
+        return c
+    return open_db()
+
+
+def open_db(factory=sqlite3.Connection):
+    # Pooled connections move between worker threads, one request at a time,
+    # and keep their prepared-statement cache across requests.
+    c = sqlite3.connect(DB, factory=factory, check_same_thread=False, cached_statements=256)
     c.row_factory = sqlite3.Row
-    c.execute("PRAGMA foreign_keys = ON;")
+    c.executescript(
+        """
+        PRAGMA synchronous = NORMAL;
+        PRAGMA temp_store = MEMORY;
+        PRAGMA cache_size = -64000;
+        PRAGMA mmap_size = 268435456;
+        PRAGMA busy_timeout = 5000;
+        PRAGMA foreign_keys = ON;
+        """
+    )
     return c
 
 
 def init_db():
     c = conn()
     try:
+        # WAL is persistent in the database file, so it only needs setting once.
+        c.execute("PRAGMA journal_mode = WAL;")
         # Base tables
         c.executescript(
             """
@@ -393,22 +562,72 @@ def init_db():
         if "reject_reason" not in req_cols:
             c.execute("ALTER TABLE requests ADD COLUMN reject_reason TEXT")
 
+        for ddl in INDEXES.values():
+            c.execute(ddl)
+
         c.commit()
     finally:
         c.close()
 
 
-def ensure_db():
-    global _DB_READY
-    if _DB_READY:
-        return
-    init_db()
-    _DB_READY = True
+# Schema is created/migrated once when the module is imported (each gunicorn
+# worker), not checked on every request.
+init_db()
+
+
+@APP.teardown_appcontext
+def _close_request_db(exc):
+    c = g.pop("db", None)
+    if c is not None:
+        c.release()
+
+
+# The member catalog (active, in-stock items) only changes through manager
+# actions, so it is reused until one happens. The TTL bounds staleness from
+# writes made in other worker processes.
+CATALOG_TTL = 30
+_catalog = {"version": 0, "expires": 0.0, "rows": None}
+_catalog_lock = threading.Lock()
+
+
+def catalog_items():
+    rows = _catalog["rows"]
+    if rows is not None and time.monotonic() < _catalog["expires"]:
+        return rows
+    # One thread refills on a miss; the rest wait and reuse its result.
+    with _catalog_lock:
+        rows = _catalog["rows"]
+        if rows is not None and time.monotonic() < _catalog["expires"]:
+            return rows
+        version = _catalog["version"]
+        c = conn()
+        try:
+            rows = c.execute(
+                """
+                SELECT item_id, item_name, unit, qty_available, image_url
+                FROM items
+                WHERE is_active=1 AND qty_available > 0
+                ORDER BY item_name
+                """
+            ).fetchall()
+        finally:
+            c.close()
+        # Don't store a result that raced with an invalidation.
+        if version == _catalog["version"]:
+            _catalog.update(expires=time.monotonic() + CATALOG_TTL, rows=rows)
+    return rows
 
 
-@APP.before_request
-def _ensure_db_before_request():
-    ensure_db()
+def invalidate_catalog():
+    _catalog["version"] += 1
+    _catalog["rows"] = None
+
+
+@APP.after_request
+def _invalidate_catalog_on_write(resp):
+    if request.method == "POST" and request.path.startswith("/manager"):
+        invalidate_catalog()
+    return resp
 
 
 # ============================================================
@@ -474,12 +693,19 @@ def check_manager_credentials(username: str, password: str) -> bool:
 
 
 def is_manager_logged_in() -> bool:
+    # Checked by the auth decorators and again by the context processor, so
+    # remember the answer for the rest of the request.
+    if "is_manager" in g:
+        return g.is_manager
+    result = False
     if get_current_manager():
-        return True
-    auth = request.authorization
-    if auth and check_manager_credentials(auth.username, auth.password):
-        return True
-    return False
+        result = True
+    else:
+        auth = request.authorization
+        if auth and check_manager_credentials(auth.username, auth.password):
+            result = True
+    g.is_manager = result
+    return result
 
 
 def requires_manager_auth(func):
@@ -541,238 +767,61 @@ def inject_manager_auth():
     }
 
 
-# ============================================================
-# UI Templates
-# ============================================================
-BASE = """
-<!doctype html>
-<html>
-<head>
-  <meta charset="utf-8" />
-  <title>{{ church_name }}</title>
-  <style>
-    @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600&family=Source+Serif+4:opsz,wght@8..60,500;8..60,700&display=swap');
-    :root {
-      --ink: #0e1320;
-      --muted: #5e6573;
-      --brand: #0b2c5f;
-      --accent: #d4a017;
-      --surface: #ffffff;
-      --soft: #f2f4f8;
-      --line: #dde3ef;
-      --shadow: 0 12px 28px rgba(10, 22, 52, 0.18);
-    }
-    * { box-sizing: border-box; }
-    body {
-      font-family: "Space Grotesk", "Helvetica Neue", Arial, sans-serif;
-      color: var(--ink);
-      margin: 0;
-      background:
-        radial-gradient(1200px 600px at 10% -10%, #efe4ff 0%, rgba(239,228,255,0) 58%),
-        radial-gradient(900px 500px at 90% 0%, #e4f0ff 0%, rgba(228,240,255,0) 55%),
-        linear-gradient(180deg, #fbfcff 0%, #f3f6fb 100%);
-    }
-    a { text-decoration: none; color: inherit; }
-    .page { max-width: 1100px; margin: 0 auto; padding: 28px 20px 48px; }
-    .site-header {
-      display: flex;
-      flex-wrap: wrap;
-      gap: 16px;
-      align-items: center;
-      justify-content: space-between;
-      padding: 18px 20px;
-      border: 1px solid var(--line);
-      border-radius: 18px;
-      background: linear-gradient(120deg, rgba(255,255,255,0.96) 0%, rgba(246,248,253,0.96) 100%);
-      box-shadow: var(--shadow);
-      margin-bottom: 22px;
-      position: sticky;
-      top: 16px;
-      backdrop-filter: blur(6px);
-      z-index: 5;
-    }
-    .brand-title {
-      font-family: "Source Serif 4", "Times New Roman", serif;
-      font-size: 26px;
-      font-weight: 700;
-      letter-spacing: 0.4px;
-    }
-    .brand-subtitle { color: var(--muted); font-size: 14px; }
-    .brand {
-      display: flex;
-      align-items: center;
-      gap: 12px;
-    }
-    .brand-logo {
-      width: 140px;
-      height: 140px;
-      border-radius: 50%;
-      border: 2px solid var(--accent);
-      background: #fff;
-      padding: 4px;
-      object-fit: cover;
-      box-shadow: 0 8px 18px rgba(10, 22, 52, 0.2);
-    }
-    .nav { display: flex; flex-wrap: wrap; gap: 10px; }
-    .nav a {
-      padding: 8px 12px;
-      border-radius: 999px;
-      background: var(--soft);
-      border: 1px solid transparent;
-      transition: transform 0.2s ease, background 0.2s ease, border-color 0.2s ease;
-      font-size: 14px;
-    }
-    .nav a:hover { transform: translateY(-1px); border-color: var(--line); background: #ffffff; }
-    .content { display: block; }
-    .card {
-      border: 1px solid var(--line);
-      border-radius: 16px;
-      padding: 18px;
-      margin: 16px 0;
-      background: var(--surface);
-      box-shadow: var(--shadow);
-      animation: rise 0.45s ease both;
-    }
-    .row { display: flex; gap: 12px; flex-wrap: wrap; }
-    .row > div { flex: 1; min-width: 240px; }
-    label { display: block; font-weight: 600; margin-top: 10px; }
-    input, select, textarea {
-      width: 100%;
-      padding: 10px 12px;
-      margin-top: 6px;
-      border-radius: 12px;
-      border: 1px solid var(--line);
-      background: #fff;
-      font-family: inherit;
-    }
-    table { border-collapse: collapse; width: 100%; margin-top: 12px; }
-    th, td { border: 1px solid var(--line); padding: 10px; vertical-align: top; }
-    th { background: #f0f3ec; text-align: left; font-weight: 600; }
-    table tr:nth-child(even) td { background: #fafaf7; }
-    .muted { color: var(--muted); font-size: 0.92em; }
-    .btn {
-      display: inline-block;
-      padding: 10px 14px;
-      border: 1px solid var(--ink);
-      border-radius: 999px;
-      background: #fff;
-      cursor: pointer;
-      font-weight: 600;
-    }
-    .btn-primary {
-      background: var(--brand);
-      color: #fff;
-      border-color: var(--brand);
-    }
-    .danger { color: #b00020; font-weight: 600; }
-    .ok { color: #0b6; font-weight: 600; }
-    .badge {
-      display: inline-block;
-      padding: 4px 8px;
-      border-radius: 999px;
-      font-size: 12px;
-      font-weight: 600;
-      margin-right: 6px;
-      background: #eef2ea;
-      border: 1px solid var(--line);
-    }
-    .badge-warn { background: #fff4dd; border-color: #f0d59b; }
-    .badge-alert { background: #ffe7e7; border-color: #f2b4b4; }
-    .stats { display: grid; grid-template-columns: repeat(auto-fit, minmax(170px, 1fr)); gap: 12px; margin-top: 10px; }
-    .stat-card {
-      padding: 12px;
-      border-radius: 14px;
-      background: linear-gradient(140deg, #ffffff 0%, #f6f8f2 100%);
-      border: 1px solid var(--line);
-    }
-    .stat-label { color: var(--muted); font-size: 12px; text-transform: uppercase; letter-spacing: 0.6px; }
-    .stat-value { font-size: 20px; font-weight: 700; margin-top: 6px; }
-    .bar-row { display: flex; align-items: center; gap: 10px; margin: 8px 0; }
-    .bar-label { width: 120px; font-size: 13px; color: var(--muted); }
-    .bar-track { flex: 1; height: 10px; background: #e6ebf5; border-radius: 999px; overflow: hidden; }
-    .bar { height: 10px; background: linear-gradient(90deg, #0b2c5f, #d4a017); border-radius: 999px; }
-    .hero {
-      display: grid;
-      grid-template-columns: minmax(280px, 1.1fr) minmax(240px, 0.9fr);
-      gap: 16px;
-      align-items: center;
-      padding: 18px;
-      background: linear-gradient(120deg, rgba(11,44,95,0.08), rgba(212,160,23,0.12));
-      border: 1px solid rgba(11,44,95,0.15);
-    }
-    .hero h3 { margin: 0 0 8px; font-size: 26px; }
-    .hero p { margin: 0 0 10px; }
-    .hero-card {
-      padding: 14px;
-      border-radius: 14px;
-      background: rgba(255,255,255,0.9);
-      border: 1px solid var(--line);
-      text-align: center;
-    }
-    .hero-badges { display: flex; flex-wrap: wrap; gap: 8px; margin-top: 10px; }
-    .hero-badge {
-      padding: 6px 10px;
-      border-radius: 999px;
-      background: #0b2c5f;
-      color: #fff;
-      font-size: 12px;
-      font-weight: 600;
-      letter-spacing: 0.4px;
-      text-transform: uppercase;
-    }
-    .hero-image {
-      width: 100%;
-      height: 360px;
-      border-radius: 18px;
-      object-fit: cover;
-      border: 1px solid var(--line);
-      box-shadow: var(--shadow);
-      margin-top: 16px;
-    }
-    @keyframes rise { from { opacity: 0; transform: translateY(10px); } to { opacity: 1; transform: translateY(0); } }
-    @media (max-width: 720px) {
-      .site-header { position: static; }
-      .brand-title { font-size: 20px; }
-      .hero { grid-template-columns: 1fr; }
-    }
-  </style>
-</head>
-<body>
-  <div class="page">
-    <header class="site-header">
-      <div class="brand">
-        <img class="brand-logo" src="{{ logo_url }}" alt="{{ church_name }} logo" />
-        <div>
-          <div class="brand-title">{{ church_name }}</div>
-          <div class="brand-subtitle">{{ church_tagline }}</div>
-        </div>
-      </div>
-      <nav class="nav">
-        <a href="{{ url_for('home') }}">Home</a>
-        <a href="{{ url_for('member_request') }}">Member Request Form</a>
-        {% if is_manager %}
-          <a href="{{ url_for('manager_stock') }}">Stock Intake</a>
-          <a href="{{ url_for('manager_requests') }}">Approvals</a>
-          <a href="/manager/stock_view">Stock View</a>
-          <a href="/manager/reports">Reports</a>
-          <a href="/manager/backup">Backup</a>
-          <a href="/manager/import">Import</a>
-          <a href="/manager/members">Members</a>
-          <a href="/manager/managers">Users</a>
-          <a href="/manager/settings">Settings</a>
-          <a href="/manager/logout">Logout</a>
-        {% else %}
-          <a href="/manager/login">Login</a>
-        {% endif %}
-      </nav>
-    </header>
-    <main class="content">
-      {{ body|safe }}
-    </main>
-  </div>
-</body>
-</html>
-"""
+# Inline page templates are literals, so each is compiled once and reused;
+# render_template_string would re-parse the source on every request.
+@functools.lru_cache(maxsize=None)
+def inline_template(source):
+    return APP.jinja_env.from_string(source)
+
+
+def render_inline(source, **context):
+    return render_template(inline_template(source), **context)
+
+
+# Placeholder rendered into base.html so the layout can be split around the body.
+BODY_MARKER = "<!-- pantry:body -->"
+
+
+# The layout only varies with login state, branding settings and the mount
+# point, so each variant is rendered once and its two halves reused.
+_base_frames = {}
+
+
+def base_frame():
+    key = (
+        is_manager_logged_in(),
+        get_setting_value("church_name", CHURCH_NAME),
+        get_setting_value("church_tagline", CHURCH_TAGLINE),
+        get_setting_value("logo_url", LOGO_URL),
+        request.script_root,
+    )
+    frame = _base_frames.get(key)
+    if frame is None:
+        head, _, tail = render_template("base.html", body=BODY_MARKER).partition(BODY_MARKER)
+        if len(_base_frames) >= 32:
+            _base_frames.clear()
+        frame = _base_frames[key] = (head, tail)
+    return frame
+
+
+def render_page(body):
+    head, tail = base_frame()
+    return "".join((head, body, tail))
+
+
+def stream_page(source, **context):
+    # Send the layout head straight away and render the body in chunks as
+    # Jinja produces them, instead of building the whole page first.
+    head, tail = base_frame()
+    APP.update_template_context(context)
+    template = inline_template(source)
+
+    def generate():
+        yield head
+        yield from template.generate(context)
+        yield tail
+
+    return Response(stream_with_context(generate()), mimetype="text/html")
 
 
 # ============================================================
@@ -805,7 +854,7 @@ def home():
       </div>
     </div>
     """
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.route("/manager/login", methods=["GET", "POST"])
@@ -834,7 +883,7 @@ def manager_login():
                 return redirect(next_url)
         error = "Invalid username or password."
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card" style="max-width:420px;">
           <h3>Manager Login</h3>
@@ -856,7 +905,7 @@ def manager_login():
         error=error,
         next_url=next_url,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.get("/manager/logout")
@@ -912,7 +961,7 @@ def manager_profile():
 
         manager = get_current_manager()
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Manager Profile</h3>
@@ -940,7 +989,7 @@ def manager_profile():
         message=message,
         error=error,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.route("/manager/managers", methods=["GET", "POST"])
@@ -1104,7 +1153,7 @@ def manager_users():
     finally:
         c.close()
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Manager Users</h3>
@@ -1184,25 +1233,14 @@ def manager_users():
         message=message,
         error=error,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.get("/member/request")
 def member_request():
-    c = conn()
-    try:
-        items = c.execute(
-            """
-            SELECT item_id, item_name, unit, qty_available, image_url
-            FROM items
-            WHERE is_active=1 AND COALESCE(qty_available, 0) > 0
-            ORDER BY item_name
-            """
-        ).fetchall()
-    finally:
-        c.close()
+    items = catalog_items()
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Member Request Form</h3>
@@ -1263,7 +1301,7 @@ def member_request():
         """,
         items=items,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.post("/member/request/preview")
@@ -1276,18 +1314,7 @@ def member_request_preview():
     if not name or not phone:
         abort(400, "Name and phone are required.")
 
-    c = conn()
-    try:
-        items = c.execute(
-            """
-            SELECT item_id, item_name, unit, qty_available, image_url
-            FROM items
-            WHERE is_active=1 AND COALESCE(qty_available, 0) > 0
-            ORDER BY item_name
-            """
-        ).fetchall()
-    finally:
-        c.close()
+    items = catalog_items()
 
     selected = []
     for it in items:
@@ -1305,9 +1332,9 @@ def member_request_preview():
 
     if not selected:
         body = '<div class="card danger"><b>No quantities selected.</b> Please go back and choose at least one item.</div>'
-        return render_template_string(BASE, body=body), 400
+        return render_page(body), 400
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Review Your Request</h3>
@@ -1356,7 +1383,7 @@ def member_request_preview():
         note=note,
         selected=selected,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.post("/member/request/submit")
@@ -1369,8 +1396,45 @@ def member_request_submit():
     if not name or not phone:
         abort(400, "Name and phone are required.")
 
+    # One pass over the form for qty_<item_id> fields with a positive amount
+    wanted = {}
+    for key, value in request.form.items():
+        # isascii() too: str.isdigit() accepts digits like "²" that int() rejects.
+        # Up to 18 digits always fits a SQLite INTEGER; longer keys are ignored.
+        digits = key[4:]
+        if key.startswith("qty_") and digits.isascii() and digits.isdigit() and len(digits) <= 18:
+            qty = parse_float(value)
+            if qty and qty > 0:
+                wanted[int(digits)] = qty
+    if len(wanted) > MAX_REQUEST_LINES:
+        abort(400, "Too many items in one request.")
+
     c = conn()
     try:
+        # Keep only the requested items that are still available
+        items = []
+        if wanted:
+            placeholders = ",".join("?" * len(wanted))
+            items = c.execute(
+                f"""
+                SELECT item_id, item_name, unit FROM items
+                WHERE is_active=1 AND qty_available > 0 AND item_id IN ({placeholders})
+                ORDER BY item_id
+                """,
+                list(wanted),
+            ).fetchall()
+
+        lines = [(it["item_id"], wanted[it["item_id"]]) for it in items]
+        selected_items = [
+            {"item_name": it["item_name"], "unit": it["unit"], "qty": wanted[it["item_id"]]} for it in items
+        ]
+
+        if not lines:
+            body = '<div class="card danger"><b>No quantities selected.</b> Please go back and choose at least one item.</div>'
+            return render_page(body), 400
+
+        c.execute("BEGIN IMMEDIATE")
+
         # Reuse member if email or phone already exists
         member_row = c.execute(
             "SELECT member_id FROM members WHERE email=? OR phone=? ORDER BY created_at DESC LIMIT 1",
@@ -1383,39 +1447,19 @@ def member_request_submit():
                 (name, phone, email, member_id),
             )
         else:
-            c.execute("INSERT INTO members (name, phone, email) VALUES (?, ?, ?)", (name, phone, email))
-            member_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
+            member_id = c.execute(
+                "INSERT INTO members (name, phone, email) VALUES (?, ?, ?)", (name, phone, email)
+            ).lastrowid
 
         # Create request
-        c.execute("INSERT INTO requests (member_id, status, note) VALUES (?, 'PENDING', ?)", (member_id, note))
-        request_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-        # Pull available items
-        items = c.execute(
-            "SELECT item_id, item_name, unit FROM items WHERE is_active=1 AND COALESCE(qty_available, 0) > 0"
-        ).fetchall()
-
-        added = 0
-        selected_items = []
-        for it in items:
-            item_id = it["item_id"]
-            qty = float(request.form.get(f"qty_{item_id}") or 0)
-            if qty > 0:
-                c.execute(
-                    "INSERT INTO request_items (request_id, item_id, qty_requested) VALUES (?, ?, ?)",
-                    (request_id, item_id, qty),
-                )
-                selected_items.append({"item_name": it["item_name"], "unit": it["unit"], "qty": qty})
-                added += 1
-
-        if added == 0:
-            # remove empty request
-            c.execute("DELETE FROM requests WHERE request_id=?", (request_id,))
-            c.execute("DELETE FROM members WHERE member_id=?", (member_id,))
-            c.commit()
-            body = '<div class="card danger"><b>No quantities selected.</b> Please go back and choose at least one item.</div>'
-            return render_template_string(BASE, body=body), 400
+        request_id = c.execute(
+            "INSERT INTO requests (member_id, status, note) VALUES (?, 'PENDING', ?)", (member_id, note)
+        ).lastrowid
 
+        c.executemany(
+            "INSERT INTO request_items (request_id, item_id, qty_requested) VALUES (?, ?, ?)",
+            [(request_id, item_id, qty) for item_id, qty in lines],
+        )
         c.commit()
     finally:
         c.close()
@@ -1427,7 +1471,7 @@ def member_request_submit():
     except Exception as exc:
         print(f"⚠️ Email notification failed: {exc}")
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Request Submitted</h3>
@@ -1453,7 +1497,7 @@ def member_request_submit():
         request_id=request_id,
         selected_items=selected_items,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.get("/manager/stock")
@@ -1498,7 +1542,7 @@ def manager_stock():
     finally:
         c.close()
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Stock Intake</h3>
@@ -1654,7 +1698,7 @@ def manager_stock():
         message=message,
         error=error,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.post("/manager/add-item")
@@ -1679,11 +1723,10 @@ def manager_add_item():
 
     c = conn()
     try:
-        c.execute(
-            "INSERT INTO items (item_name, unit, expiry_date, image_url, qty_available, unit_cost, is_active) VALUES (?, ?, ?, ?, ?, ?, 1)",
+        item_id = c.execute(
+            "INSERT INTO items (item_name, unit, expiry_date, image_url, qty_available, unit_cost, is_active) VALUES (?, ?, ?, ?, ?, ?, 1) RETURNING item_id",
             (item_name, unit, expiry_date, image_url, max(0, initial_qty), unit_cost_val),
-        )
-        item_id = c.execute("SELECT item_id FROM items WHERE item_name=?", (item_name,)).fetchone()["item_id"]
+        ).fetchone()["item_id"]
 
         if initial_qty > 0:
             c.execute(
@@ -1691,6 +1734,8 @@ def manager_add_item():
                 (item_id, initial_qty, current_manager_name()),
             )
         c.commit()
+    except sqlite3.IntegrityError:
+        return redirect(url_for("manager_stock", err="Item name must be unique."))
     finally:
         c.close()
 
@@ -1716,26 +1761,27 @@ def manager_update_item():
 
     c = conn()
     try:
+        c.execute("BEGIN IMMEDIATE")
         if add_qty > 0:
             c.execute(
                 "INSERT INTO stock_movements (item_id, movement_type, qty, note, created_by) VALUES (?, 'IN', ?, 'Intake', ?)",
                 (item_id, add_qty, current_manager_name()),
             )
-            c.execute(
-                "UPDATE items SET qty_available = qty_available + ? WHERE item_id=?",
-                (add_qty, item_id),
-            )
 
-        if expiry_update:
-            c.execute("UPDATE items SET expiry_date=? WHERE item_id=?", (expiry_update, item_id))
-
-        if unit_cost_val is not None:
-            c.execute("UPDATE items SET unit_cost=? WHERE item_id=?", (unit_cost_val, item_id))
-
-        if image_url:
-            c.execute("UPDATE items SET image_url=? WHERE item_id=?", (image_url, item_id))
-
-        c.execute("UPDATE items SET is_active=? WHERE item_id=?", (is_active, item_id))
+        # Fields left blank on the form keep their current value. The comparison
+        # (not max()) also maps a NaN add_qty to 0 rather than binding NULL.
+        c.execute(
+            """
+            UPDATE items
+            SET qty_available = qty_available + ?,
+                expiry_date = COALESCE(?, expiry_date),
+                unit_cost = COALESCE(?, unit_cost),
+                image_url = COALESCE(?, image_url),
+                is_active = ?
+            WHERE item_id=?
+            """,
+            (add_qty if add_qty > 0 else 0, expiry_update, unit_cost_val, image_url, is_active, item_id),
+        )
 
         c.commit()
     finally:
@@ -1868,18 +1914,24 @@ def manager_requests():
             params,
         ).fetchall()
 
-        items_by_req = {}
-        for r in reqs:
-            rows = c.execute(
-                """
-                SELECT i.item_name, i.unit, ri.qty_requested, i.qty_available
+        # Lines for exactly the listed requests, by id, so a request submitted
+        # after the SELECT above can't show up here without a header row.
+        items_by_req = {r["request_id"]: [] for r in reqs}
+        req_ids = list(items_by_req)
+        for start in range(0, len(req_ids), IN_LIST_CHUNK):
+            chunk = req_ids[start:start + IN_LIST_CHUNK]
+            lines = c.execute(
+                f"""
+                SELECT ri.request_id, i.item_name, i.unit, ri.qty_requested, i.qty_available
                 FROM request_items ri
                 JOIN items i ON i.item_id = ri.item_id
-                WHERE ri.request_id = ?
+                WHERE ri.request_id IN ({",".join("?" * len(chunk))})
+                ORDER BY ri.request_item_id
                 """,
-                (r["request_id"],),
+                chunk,
             ).fetchall()
-            items_by_req[r["request_id"]] = rows
+            for line in lines:
+                items_by_req[line["request_id"]].append(line)
 
         urgent_rows = c.execute(
             """
@@ -1891,11 +1943,11 @@ def manager_requests():
               AND (
                 i.is_active != 1
                 OR ri.qty_requested > COALESCE(i.qty_available, 0)
-                OR (i.expiry_date IS NOT NULL AND date(i.expiry_date) <= date('now', ?))
+                OR (i.expiry_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' AND i.expiry_date < ?)
                 OR (COALESCE(i.qty_available, 0) > 0 AND COALESCE(i.qty_available, 0) <= ?)
               )
             """,
-            (f"+{exp_days} day", low_threshold),
+            (expiry_cutoff(exp_days), low_threshold),
         ).fetchall()
         urgent_ids = {r["request_id"] for r in urgent_rows}
         if urgent_only:
@@ -1903,7 +1955,7 @@ def manager_requests():
     finally:
         c.close()
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Approvals | <a href="/manager/stock_view">Stock View</a> | <a href="/manager/reports">Reports</a></h3>
@@ -2048,7 +2100,7 @@ def manager_requests():
         urgent_only=urgent_only,
         urgent_ids=urgent_ids,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.get("/manager/requests.csv")
@@ -2113,11 +2165,11 @@ def manager_requests_csv():
                   AND (
                     i.is_active != 1
                     OR ri.qty_requested > COALESCE(i.qty_available, 0)
-                    OR (i.expiry_date IS NOT NULL AND date(i.expiry_date) <= date('now', ?))
+                    OR (i.expiry_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' AND i.expiry_date < ?)
                     OR (COALESCE(i.qty_available, 0) > 0 AND COALESCE(i.qty_available, 0) <= ?)
                   )
                 """,
-                (f"+{exp_days} day", low_threshold),
+                (expiry_cutoff(exp_days), low_threshold),
             ).fetchall()
             urgent_ids = {r["request_id"] for r in urgent_rows}
             reqs = [r for r in reqs if r["request_id"] in urgent_ids]
@@ -2203,7 +2255,7 @@ def manager_request_edit(req_id: int):
             (req_id,),
         ).fetchone()
         if not req:
-            return render_template_string(BASE, body="<h3>Request not found.</h3>"), 404
+            return render_page("<h3>Request not found.</h3>"), 404
 
         items = c.execute(
             """
@@ -2220,10 +2272,7 @@ def manager_request_edit(req_id: int):
             reject_reason = (request.form.get("reject_reason") or "").strip()
             status = (request.form.get("status") or "PENDING").strip().upper()
             if status not in ("PENDING", "APPROVED", "REJECTED"):
-                return render_template_string(
-                    BASE,
-                    body="<div class='card danger'><b>Invalid status.</b></div>",
-                ), 400
+                return render_page("<div class='card danger'><b>Invalid status.</b></div>"), 400
             decided_at = req["decided_at"]
             decided_by = req["decided_by"]
             if status != req["status"]:
@@ -2254,7 +2303,7 @@ def manager_request_edit(req_id: int):
     finally:
         c.close()
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Edit Request #{{ req.request_id }}</h3>
@@ -2305,7 +2354,7 @@ def manager_request_edit(req_id: int):
         req=req,
         items=items,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.get("/manager/members")
@@ -2339,7 +2388,7 @@ def manager_members():
     finally:
         c.close()
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Members</h3>
@@ -2398,7 +2447,7 @@ def manager_members():
         message=message,
         error=error,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.post("/manager/edit-member")
@@ -2473,9 +2522,7 @@ def manager_settings():
                 try:
                     logo_url = save_uploaded_image(logo_file)
                 except ValueError as exc:
-                    return render_template_string(
-                        BASE, body=f"<div class='card danger'><b>{exc}</b></div>"
-                    ), 400
+                    return render_page(f"<div class='card danger'><b>{exc}</b></div>"), 400
 
             if church_name:
                 set_setting_value("church_name", church_name)
@@ -2524,7 +2571,7 @@ def manager_settings():
         "sync_token_set": bool(get_setting_value("sync_token", PANTRY_SYNC_TOKEN)),
     }
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Settings</h3>
@@ -2577,7 +2624,7 @@ def manager_settings():
         error=error,
         settings=settings,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.post("/manager/requests/bulk")
@@ -2589,7 +2636,7 @@ def manager_requests_bulk():
 
     if not request_ids:
         body = '<div class="card"><p class="muted">No requests selected.</p><p><a href="/manager/requests">Back to requests</a></p></div>'
-        return render_template_string(BASE, body=body)
+        return render_page(body)
 
     if action not in ("APPROVE", "REJECT"):
         abort(400, "Invalid bulk action")
@@ -2616,8 +2663,8 @@ def manager_requests_bulk():
 
             if action == "REJECT":
                 c.execute(
-                    "UPDATE requests SET status='REJECTED', reject_reason=?, decided_at=?, decided_by=? WHERE request_id=?",
-                    (reject_reason, datetime.utcnow().isoformat(), current_manager_name(), req_id),
+                    f"UPDATE requests SET status='REJECTED', reject_reason=?, decided_at={SQL_NOW}, decided_by=? WHERE request_id=?",
+                    (reject_reason, current_manager_name(), req_id),
                 )
                 results["rejected"].append(req_id)
                 if r["email"]:
@@ -2659,8 +2706,8 @@ def manager_requests_bulk():
                 )
 
             c.execute(
-                "UPDATE requests SET status='APPROVED', decided_at=?, decided_by=? WHERE request_id=?",
-                (datetime.utcnow().isoformat(), current_manager_name(), req_id),
+                f"UPDATE requests SET status='APPROVED', decided_at={SQL_NOW}, decided_by=? WHERE request_id=?",
+                (current_manager_name(), req_id),
             )
             results["approved"].append(req_id)
 
@@ -2668,7 +2715,7 @@ def manager_requests_bulk():
     finally:
         c.close()
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Bulk Action Results</h3>
@@ -2701,7 +2748,7 @@ def manager_requests_bulk():
         """,
         results=results,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.get("/manager/reports")
@@ -2719,27 +2766,29 @@ def manager_reports():
 
     c = conn()
     try:
-        total_items = c.execute("SELECT COUNT(*) AS cnt FROM items").fetchone()["cnt"]
-        active_items = c.execute("SELECT COUNT(*) AS cnt FROM items WHERE is_active=1").fetchone()["cnt"]
-        inactive_items = c.execute("SELECT COUNT(*) AS cnt FROM items WHERE is_active!=1").fetchone()["cnt"]
-        in_stock_items = c.execute(
-            "SELECT COUNT(*) AS cnt FROM items WHERE COALESCE(qty_available, 0) > 0"
-        ).fetchone()["cnt"]
-        out_stock_items = c.execute(
-            "SELECT COUNT(*) AS cnt FROM items WHERE COALESCE(qty_available, 0) <= 0"
-        ).fetchone()["cnt"]
-        total_qty = c.execute(
-            "SELECT COALESCE(SUM(qty_available), 0) AS total_qty FROM items"
-        ).fetchone()["total_qty"]
-        inventory_value = c.execute(
-            "SELECT COALESCE(SUM(COALESCE(qty_available, 0) * COALESCE(unit_cost, 0)), 0) AS total_value FROM items"
-        ).fetchone()["total_value"]
+        totals = c.execute(
+            """
+            SELECT COUNT(*) AS total_items,
+                   COALESCE(SUM(is_active=1), 0) AS active_items,
+                   COALESCE(SUM(qty_available > 0), 0) AS in_stock_items,
+                   COALESCE(SUM(qty_available), 0) AS total_qty,
+                   COALESCE(SUM(COALESCE(qty_available, 0) * COALESCE(unit_cost, 0)), 0) AS total_value
+            FROM items
+            """
+        ).fetchone()
+        total_items = totals["total_items"]
+        active_items = totals["active_items"]
+        inactive_items = total_items - active_items
+        in_stock_items = totals["in_stock_items"]
+        out_stock_items = total_items - in_stock_items
+        total_qty = totals["total_qty"]
+        inventory_value = totals["total_value"]
 
         low_stock = c.execute(
             """
-            SELECT item_name, unit, qty_available
+            SELECT item_name, unit, printf('%.2f', qty_available) AS qty_fmt
             FROM items
-            WHERE is_active=1 AND COALESCE(qty_available, 0) > 0 AND qty_available <= ?
+            WHERE is_active=1 AND qty_available > 0 AND qty_available <= ?
             ORDER BY qty_available ASC, item_name
             """,
             (low_threshold,),
@@ -2747,27 +2796,37 @@ def manager_reports():
 
         expiring = c.execute(
             """
-            SELECT item_name, unit, qty_available, expiry_date
+            SELECT item_name, unit, printf('%.2f', qty_available) AS qty_fmt, expiry_date
             FROM items
-            WHERE expiry_date IS NOT NULL
-              AND date(expiry_date) <= date('now', ?)
-            ORDER BY date(expiry_date), item_name
+            WHERE expiry_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' AND expiry_date < ?
+            ORDER BY expiry_date, item_name
             """,
-            (f"+{exp_days} day",),
+            (expiry_cutoff(exp_days),),
         ).fetchall()
 
-        status_rows = c.execute(
-            "SELECT status, COUNT(*) AS cnt FROM requests GROUP BY status"
-        ).fetchall()
-        status_counts = {r["status"]: r["cnt"] for r in status_rows}
-        total_requests = sum(status_counts.values())
-        recent_requests = c.execute(
-            "SELECT COUNT(*) AS cnt FROM requests WHERE date(created_at) >= date('now', '-30 day')"
-        ).fetchone()["cnt"]
+        req_totals = c.execute(
+            """
+            SELECT COUNT(*) AS total,
+                   COALESCE(SUM(status='PENDING'), 0) AS pending,
+                   COALESCE(SUM(status='APPROVED'), 0) AS approved,
+                   COALESCE(SUM(status='REJECTED'), 0) AS rejected,
+                   COALESCE(SUM(date(created_at) >= date('now', '-30 day')), 0) AS recent
+            FROM requests
+            """
+        ).fetchone()
+        status_counts = {
+            "PENDING": req_totals["pending"],
+            "APPROVED": req_totals["approved"],
+            "REJECTED": req_totals["rejected"],
+        }
+        total_requests = req_totals["total"]
+        recent_requests = req_totals["recent"]
 
         gaps = c.execute(
             """
-            SELECT r.request_id, i.item_name, i.unit, ri.qty_requested, i.qty_available, i.is_active
+            SELECT r.request_id, i.item_name, i.unit, i.is_active,
+                   printf('%.2f', ri.qty_requested) AS requested_fmt,
+                   printf('%.2f', COALESCE(i.qty_available, 0)) AS available_fmt
             FROM requests r
             JOIN request_items ri ON ri.request_id = r.request_id
             JOIN items i ON i.item_id = ri.item_id
@@ -2779,7 +2838,8 @@ def manager_reports():
 
         top_items = c.execute(
             """
-            SELECT i.item_name, i.unit, SUM(ri.qty_requested) AS total_requested
+            SELECT i.item_name, i.unit, SUM(ri.qty_requested) AS total_requested,
+                   printf('%.2f', SUM(ri.qty_requested)) AS total_fmt
             FROM request_items ri
             JOIN items i ON i.item_id = ri.item_id
             GROUP BY i.item_id
@@ -2815,7 +2875,7 @@ def manager_reports():
 
         idle_items = c.execute(
             """
-            SELECT i.item_name, i.unit, i.qty_available
+            SELECT i.item_name, i.unit, printf('%.2f', i.qty_available) AS qty_fmt
             FROM items i
             WHERE NOT EXISTS (
                 SELECT 1
@@ -2878,17 +2938,17 @@ def manager_reports():
 
         movement_rows = c.execute(
             """
-            SELECT movement_type, COALESCE(SUM(qty), 0) AS total_qty
+            SELECT movement_type, printf('%.2f', COALESCE(SUM(qty), 0)) AS total_fmt
             FROM stock_movements
             WHERE date(created_at) >= date('now', '-30 day')
             GROUP BY movement_type
             """
         ).fetchall()
-        movement_totals = {r["movement_type"]: r["total_qty"] for r in movement_rows}
+        movement_totals = {r["movement_type"]: r["total_fmt"] for r in movement_rows}
     finally:
         c.close()
 
-    body = render_template_string(
+    return stream_page(
         """
         <div class="card">
           <h3>Reports</h3>
@@ -2992,7 +3052,7 @@ def manager_reports():
                 <tr>
                   <td>{{ it["item_name"] }}</td>
                   <td>{{ it["unit"] }}</td>
-                  <td>{{ '%.2f'|format(it["qty_available"]) }}</td>
+                  <td>{{ it["qty_fmt"] }}</td>
                 </tr>
               {% endfor %}
             {% endif %}
@@ -3013,7 +3073,7 @@ def manager_reports():
                 <tr>
                   <td>{{ it["item_name"] }}</td>
                   <td>{{ it["unit"] }}</td>
-                  <td>{{ '%.2f'|format(it["qty_available"]) }}</td>
+                  <td>{{ it["qty_fmt"] }}</td>
                   <td>{{ it["expiry_date"] }}</td>
                 </tr>
               {% endfor %}
@@ -3045,8 +3105,8 @@ def manager_reports():
                   <td>#{{ g["request_id"] }}</td>
                   <td>{{ g["item_name"] }}</td>
                   <td>{{ g["unit"] }}</td>
-                  <td>{{ '%.2f'|format(g["qty_requested"]) }}</td>
-                  <td>{{ '%.2f'|format(g["qty_available"] or 0) }}</td>
+                  <td>{{ g["requested_fmt"] }}</td>
+                  <td>{{ g["available_fmt"] }}</td>
                   <td>{% if g["is_active"] != 1 %}Inactive{% else %}Insufficient{% endif %}</td>
                 </tr>
               {% endfor %}
@@ -3065,7 +3125,7 @@ def manager_reports():
                 <tr>
                   <td>{{ it["item_name"] }}</td>
                   <td>{{ it["unit"] }}</td>
-                  <td>{{ '%.2f'|format(it["total_requested"]) }}</td>
+                  <td>{{ it["total_fmt"] }}</td>
                 </tr>
               {% endfor %}
             {% endif %}
@@ -3119,7 +3179,7 @@ def manager_reports():
                 <tr>
                   <td>{{ it["item_name"] }}</td>
                   <td>{{ it["unit"] }}</td>
-                  <td>{{ '%.2f'|format(it["qty_available"]) }}</td>
+                  <td>{{ it["qty_fmt"] }}</td>
                 </tr>
               {% endfor %}
             {% endif %}
@@ -3138,8 +3198,8 @@ def manager_reports():
           <h4>Stock Movements (Last 30 Days)</h4>
           <table>
             <tr><th>Type</th><th>Total Qty</th></tr>
-            <tr><td>IN</td><td>{{ '%.2f'|format(movement_totals.get("IN", 0) or 0) }}</td></tr>
-            <tr><td>OUT</td><td>{{ '%.2f'|format(movement_totals.get("OUT", 0) or 0) }}</td></tr>
+            <tr><td>IN</td><td>{{ movement_totals.get("IN", "0.00") }}</td></tr>
+            <tr><td>OUT</td><td>{{ movement_totals.get("OUT", "0.00") }}</td></tr>
           </table>
         </div>
         """,
@@ -3167,7 +3227,6 @@ def manager_reports():
         inventory_value=inventory_value,
         movement_totals=movement_totals,
     )
-    return render_template_string(BASE, body=body)
 
 
 @APP.get("/manager/reports/export/<string:kind>")
@@ -3190,7 +3249,7 @@ def manager_reports_export(kind: str):
                 """
                 SELECT item_name, unit, qty_available
                 FROM items
-                WHERE is_active=1 AND COALESCE(qty_available, 0) > 0 AND qty_available <= ?
+                WHERE is_active=1 AND qty_available > 0 AND qty_available <= ?
                 ORDER BY qty_available ASC, item_name
                 """,
                 (low_threshold,),
@@ -3205,11 +3264,10 @@ def manager_reports_export(kind: str):
                 """
                 SELECT item_name, unit, qty_available, expiry_date
                 FROM items
-                WHERE expiry_date IS NOT NULL
-                  AND date(expiry_date) <= date('now', ?)
-                ORDER BY date(expiry_date), item_name
+                WHERE expiry_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' AND expiry_date < ?
+                ORDER BY expiry_date, item_name
                 """,
-                (f"+{exp_days} day",),
+                (expiry_cutoff(exp_days),),
             ).fetchall()
             csv_rows = [["item_name", "unit", "qty_available", "expiry_date"]]
             for it in rows:
@@ -3221,6 +3279,16 @@ def manager_reports_export(kind: str):
     abort(404, "Unknown export type")
 
 
+def expiry_cutoff(exp_days: int) -> str:
+    # First UTC day past the window. expiry_date is stored as YYYY-MM-DD, so
+    # "expiry_date < cutoff" is a plain text range the index can serve; the
+    # callers pair it with an ISO-shape GLOB so blank or non-ISO text (which
+    # date() used to turn into NULL) is never counted as expiring. The window is
+    # clamped to +/-100 years so a huge ?exp= can't overflow date arithmetic.
+    exp_days = max(-36500, min(exp_days, 36500))
+    return (datetime.utcnow().date() + timedelta(days=exp_days + 1)).isoformat()
+
+
 def build_stock_flags(expiry_date: str | None, qty_available: float, is_active: int, low_threshold: int, exp_days: int, today_date):
     labels = []
     if is_active != 1:
@@ -3258,12 +3326,12 @@ def manager_decide_request():
         if r["status"] != "PENDING":
             return redirect(url_for("manager_requests"))
 
-            if decision == "REJECT":
-                c.execute(
-                    "UPDATE requests SET status='REJECTED', reject_reason=?, decided_at=?, decided_by=? WHERE request_id=?",
-                    (reject_reason, datetime.utcnow().isoformat(), current_manager_name(), req_id),
-                )
-                c.commit()
+        if decision == "REJECT":
+            c.execute(
+                f"UPDATE requests SET status='REJECTED', reject_reason=?, decided_at={SQL_NOW}, decided_by=? WHERE request_id=?",
+                (reject_reason, current_manager_name(), req_id),
+            )
+            c.commit()
             try:
                 member = c.execute(
                     """
@@ -3302,22 +3370,23 @@ def manager_decide_request():
                   Available: {row['qty_available']}
                 </div>
                 """
-                return render_template_string(BASE, body=body), 400
+                return render_page(body), 400
 
         # deduct stock
-        for row in rows:
-            c.execute(
-                "UPDATE items SET qty_available = qty_available - ? WHERE item_id=?",
-                (row["qty_requested"], row["item_id"]),
-            )
-            c.execute(
-                "INSERT INTO stock_movements (item_id, movement_type, qty, note, created_by) VALUES (?, 'OUT', ?, ?, ?)",
-                (row["item_id"], row["qty_requested"], f"Approved request #{req_id}", current_manager_name()),
-            )
+        manager_name = current_manager_name()
+        note = f"Approved request #{req_id}"
+        c.executemany(
+            "UPDATE items SET qty_available = qty_available - ? WHERE item_id=?",
+            [(row["qty_requested"], row["item_id"]) for row in rows],
+        )
+        c.executemany(
+            "INSERT INTO stock_movements (item_id, movement_type, qty, note, created_by) VALUES (?, 'OUT', ?, ?, ?)",
+            [(row["item_id"], row["qty_requested"], note, manager_name) for row in rows],
+        )
 
         c.execute(
-            "UPDATE requests SET status='APPROVED', decided_at=?, decided_by=? WHERE request_id=?",
-            (datetime.utcnow().isoformat(), current_manager_name(), req_id),
+            f"UPDATE requests SET status='APPROVED', decided_at={SQL_NOW}, decided_by=? WHERE request_id=?",
+            (manager_name, req_id),
         )
 
         c.commit()
@@ -3376,81 +3445,102 @@ def manager_stock_view():
     rows = []
     today = datetime.utcnow().date()
     for it in items:
-        status = "Active" if (it["is_active"] == 1) else "Inactive"
         qty_available = float(it["qty_available"] or 0.0)
         flags = build_stock_flags(it["expiry_date"], qty_available, it["is_active"], low_threshold, exp_days, today)
-        badge_parts = []
-        for label in flags:
-            badge_class = "badge-alert" if ("Expiring" in label or "Expired" in label or label == "Inactive") else "badge-warn"
-            badge_parts.append(f'<span class="badge {badge_class}">{label}</span>')
-        badges_html = " ".join(badge_parts) if badge_parts else '<span class="muted">-</span>'
-        img_html = ""
-        if it["image_url"]:
-            img_html = (
-                f'<img src="{it["image_url"]}" alt="{it["item_name"]}" '
-                'style="max-width:70px; max-height:70px; display:block;" />'
-            )
-        rows.append(f"""
-        <tr>
-          <td>{img_html}</td>
-          <td>{it["item_name"]}</td>
-          <td>{it["unit"]}</td>
-          <td>{qty_available:.2f}</td>
-          <td>{it["expiry_date"] or ""}</td>
-          <td>{status}</td>
-          <td>{badges_html}</td>
-        </tr>
-        """)
-
-    body = f"""
-    <h2>Current Stock</h2>
-    <p><a href="/manager/stock">Back to Intake</a></p>
-    <div class="card">
-      <form method="GET">
-        <div class="row">
-          <div>
-            <label>Search</label>
-            <input name="q" value="{q}" placeholder="Search by name or unit" />
-          </div>
-          <div>
-            <label>Sort by</label>
-            <select name="sort">
-              <option value="name" {"selected" if sort == "name" else ""}>Name</option>
-              <option value="qty" {"selected" if sort == "qty" else ""}>Qty</option>
-              <option value="expiry" {"selected" if sort == "expiry" else ""}>Expiry</option>
-              <option value="status" {"selected" if sort == "status" else ""}>Status</option>
-            </select>
-          </div>
-          <div>
-            <label>Order</label>
-            <select name="dir">
-              <option value="asc" {"selected" if direction == "asc" else ""}>Ascending</option>
-              <option value="desc" {"selected" if direction == "desc" else ""}>Descending</option>
-            </select>
-          </div>
-          <div>
-            <label>Low stock <=</label>
-            <input name="low" type="number" min="0" step="1" value="{low_threshold}" />
-          </div>
-          <div>
-            <label>Expiring within days</label>
-            <input name="exp" type="number" min="1" step="1" value="{exp_days}" />
-          </div>
-          <div style="align-self:flex-end;">
-            <button class="btn btn-primary" type="submit">Apply</button>
-          </div>
-          <div style="align-self:flex-end;">
-            <a class="btn" href="/manager/stock_view.csv?q={q}&sort={sort}&dir={direction}&low={low_threshold}&exp={exp_days}">Export CSV</a>
-          </div>
+        rows.append(
+            {
+                "item_name": it["item_name"],
+                "unit": it["unit"],
+                "qty": qty_available,
+                "expiry_date": it["expiry_date"],
+                "image_url": it["image_url"],
+                "status": "Active" if (it["is_active"] == 1) else "Inactive",
+                "badges": [
+                    (label, "badge-alert" if ("Expiring" in label or "Expired" in label or label == "Inactive") else "badge-warn")
+                    for label in flags
+                ],
+            }
+        )
+
+    body = render_inline(
+        """
+        <h2>Current Stock</h2>
+        <p><a href="/manager/stock">Back to Intake</a></p>
+        <div class="card">
+          <form method="GET">
+            <div class="row">
+              <div>
+                <label>Search</label>
+                <input name="q" value="{{ q }}" placeholder="Search by name or unit" />
+              </div>
+              <div>
+                <label>Sort by</label>
+                <select name="sort">
+                  <option value="name" {% if sort == "name" %}selected{% endif %}>Name</option>
+                  <option value="qty" {% if sort == "qty" %}selected{% endif %}>Qty</option>
+                  <option value="expiry" {% if sort == "expiry" %}selected{% endif %}>Expiry</option>
+                  <option value="status" {% if sort == "status" %}selected{% endif %}>Status</option>
+                </select>
+              </div>
+              <div>
+                <label>Order</label>
+                <select name="dir">
+                  <option value="asc" {% if direction == "asc" %}selected{% endif %}>Ascending</option>
+                  <option value="desc" {% if direction == "desc" %}selected{% endif %}>Descending</option>
+                </select>
+              </div>
+              <div>
+                <label>Low stock <=</label>
+                <input name="low" type="number" min="0" step="1" value="{{ low_threshold }}" />
+              </div>
+              <div>
+                <label>Expiring within days</label>
+                <input name="exp" type="number" min="1" step="1" value="{{ exp_days }}" />
+              </div>
+              <div style="align-self:flex-end;">
+                <button class="btn btn-primary" type="submit">Apply</button>
+              </div>
+              <div style="align-self:flex-end;">
+                <a class="btn" href="/manager/stock_view.csv?q={{ q|urlencode }}&sort={{ sort }}&dir={{ direction }}&low={{ low_threshold }}&exp={{ exp_days }}">Export CSV</a>
+              </div>
+            </div>
+          </form>
         </div>
-      </form>
-    </div>
-    <table border="1" cellpadding="8" cellspacing="0">
-      <tr><th>Image</th><th>Item</th><th>Unit</th><th>Qty</th><th>Expiry</th><th>Status</th><th>Flags</th></tr>
-      {''.join(rows) if rows else '<tr><td colspan="7">No items found</td></tr>'}
-    </table>
-    """
-    return render_template_string(BASE, body=body)
+        <table border="1" cellpadding="8" cellspacing="0">
+          <tr><th>Image</th><th>Item</th><th>Unit</th><th>Qty</th><th>Expiry</th><th>Status</th><th>Flags</th></tr>
+          {% for row in rows %}
+            <tr>
+              <td>
+                {% if row.image_url %}
+                  <img src="{{ row.image_url }}" alt="{{ row.item_name }}" style="max-width:70px; max-height:70px; display:block;" />
+                {% endif %}
+              </td>
+              <td>{{ row.item_name }}</td>
+              <td>{{ row.unit }}</td>
+              <td>{{ '%.2f'|format(row.qty) }}</td>
+              <td>{{ row.expiry_date or "" }}</td>
+              <td>{{ row.status }}</td>
+              <td>
+                {% for label, badge_class in row.badges %}
+                  <span class="badge {{ badge_class }}">{{ label }}</span>
+                {% else %}
+                  <span class="muted">-</span>
+                {% endfor %}
+              </td>
+            </tr>
+          {% else %}
+            <tr><td colspan="7">No items found</td></tr>
+          {% endfor %}
+        </table>
+        """,
+        rows=rows,
+        q=q,
+        sort=sort,
+        direction=direction,
+        low_threshold=low_threshold,
+        exp_days=exp_days,
+    )
+    return render_page(body)
 
 
 @APP.get("/manager/stock_view.csv")
@@ -3620,22 +3710,7 @@ def manager_stock_movements_csv():
 @APP.get("/manager/uploads.zip")
 @requires_sync_or_manager
 def manager_uploads_zip():
-    mem = io.BytesIO()
-    with zipfile.ZipFile(mem, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        if os.path.isdir(UPLOAD_FOLDER):
-            for root, _, files in os.walk(UPLOAD_FOLDER):
-                for fname in files:
-                    full_path = os.path.join(root, fname)
-                    rel_path = os.path.relpath(full_path, UPLOAD_FOLDER)
-                    zf.write(full_path, os.path.join("uploads", rel_path))
-        static_files = ["church_logo.jpeg", "hero_pantry.jpg", "hero_pantry.webp"]
-        static_dir = os.path.join(os.path.dirname(__file__), "static")
-        for fname in static_files:
-            full_path = os.path.join(static_dir, fname)
-            if os.path.exists(full_path):
-                zf.write(full_path, os.path.join("static", fname))
-    mem.seek(0)
-    resp = Response(mem.read(), mimetype="application/zip")
+    resp = Response(build_uploads_zip_bytes(), mimetype="application/zip")
     resp.headers["Content-Disposition"] = "attachment; filename=uploads.zip"
     return resp
 
@@ -3665,7 +3740,7 @@ def manager_backup_zip():
 @APP.get("/manager/backup")
 @requires_manager_auth
 def manager_backup():
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Full Backup</h3>
@@ -3700,7 +3775,7 @@ def manager_backup():
         </div>
         """
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 def export_items_rows():
@@ -3857,10 +3932,14 @@ def build_uploads_zip_bytes():
                     zf.write(full_path, os.path.join("uploads", rel_path))
         static_files = ["church_logo.jpeg", "hero_pantry.jpg", "hero_pantry.webp"]
         static_dir = os.path.join(os.path.dirname(__file__), "static")
+        try:
+            with os.scandir(static_dir) as entries:
+                present = {entry.name for entry in entries}
+        except FileNotFoundError:
+            present = set()
         for fname in static_files:
-            full_path = os.path.join(static_dir, fname)
-            if os.path.exists(full_path):
-                zf.write(full_path, os.path.join("static", fname))
+            if fname in present:
+                zf.write(os.path.join(static_dir, fname), os.path.join("static", fname))
     mem.seek(0)
     return mem.read()
 
@@ -3892,345 +3971,378 @@ def fetch_render_file(path: str) -> bytes:
         return resp.read()
 
 
-def apply_backup_import(
-    items_bytes: bytes,
-    requests_bytes: bytes,
-    movements_bytes: bytes,
-    managers_bytes: bytes,
-    uploads_bytes: bytes,
-    mirror_local: bool = False,
-) -> None:
-    items_stream = io.TextIOWrapper(io.BytesIO(items_bytes), encoding="utf-8", errors="replace")
-    reader = csv.DictReader(items_stream)
-    c = conn()
-    try:
-        if mirror_local:
-            c.execute("DELETE FROM request_items")
-            c.execute("DELETE FROM requests")
-            c.execute("DELETE FROM members")
-            c.execute("DELETE FROM stock_movements")
-            c.execute("DELETE FROM items")
-            c.execute("DELETE FROM managers")
-            if os.path.isdir(UPLOAD_FOLDER):
-                for root, _, files in os.walk(UPLOAD_FOLDER):
-                    for fname in files:
-                        os.remove(os.path.join(root, fname))
-
-        for row in reader:
-            item_id_text = (row.get("item_id") or "").strip()
-            name = (row.get("item_name") or "").strip()
-            unit = (row.get("unit") or "").strip()
-            qty = parse_float(row.get("qty_available")) or 0.0
-            unit_cost = parse_float(row.get("unit_cost"))
-            expiry_date = (row.get("expiry_date") or "").strip() or None
-            is_active = parse_bool_status(row.get("status") or "")
-            image_url = (row.get("image_url") or "").strip() or None
-            if not name or not unit:
-                continue
-            if item_id_text.isdigit():
-                existing = c.execute(
-                    "SELECT item_id FROM items WHERE item_id=?",
-                    (int(item_id_text),),
-                ).fetchone()
-                if existing:
-                    if image_url is not None:
-                        c.execute(
-                            """
-                            UPDATE items
-                            SET item_name=?, unit=?, qty_available=?, unit_cost=?, expiry_date=?, is_active=?, image_url=?
-                            WHERE item_id=?
-                            """,
-                            (name, unit, qty, unit_cost, expiry_date, is_active, image_url, int(item_id_text)),
-                        )
-                    else:
-                        c.execute(
-                            """
-                            UPDATE items
-                            SET item_name=?, unit=?, qty_available=?, unit_cost=?, expiry_date=?, is_active=?
-                            WHERE item_id=?
-                            """,
-                            (name, unit, qty, unit_cost, expiry_date, is_active, int(item_id_text)),
-                        )
-                else:
-                    c.execute(
-                        """
-                        INSERT INTO items (item_id, item_name, unit, qty_available, unit_cost, expiry_date, is_active, image_url)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (int(item_id_text), name, unit, qty, unit_cost, expiry_date, is_active, image_url),
-                    )
-            else:
-                existing = c.execute(
-                    "SELECT item_id FROM items WHERE item_name=?",
-                    (name,),
-                ).fetchone()
-                if existing:
-                    if image_url is not None:
-                        c.execute(
-                            """
-                            UPDATE items
-                            SET unit=?, qty_available=?, unit_cost=?, expiry_date=?, is_active=?, image_url=?
-                            WHERE item_id=?
-                            """,
-                            (unit, qty, unit_cost, expiry_date, is_active, image_url, existing["item_id"]),
-                        )
-                    else:
-                        c.execute(
-                            """
-                            UPDATE items
-                            SET unit=?, qty_available=?, unit_cost=?, expiry_date=?, is_active=?
-                            WHERE item_id=?
-                            """,
-                            (unit, qty, unit_cost, expiry_date, is_active, existing["item_id"]),
-                        )
-                else:
-                    c.execute(
-                        """
-                        INSERT INTO items (item_name, unit, qty_available, unit_cost, expiry_date, is_active, image_url)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (name, unit, qty, unit_cost, expiry_date, is_active, image_url),
-                    )
+# One "Name (unit) x qty" entry from the requests.csv items column; the unit
+# and quantity are optional and the quantity follows the last " x ".
+REQUEST_ITEM_RE = re.compile(r"^(?P<name>.+?)(?: \((?P<unit>(?:(?! \().)*)\))?\s*(?: (?!.* x )x (?P<qty>.*))?$")
 
-        req_stream = io.TextIOWrapper(io.BytesIO(requests_bytes), encoding="utf-8", errors="replace")
-        req_reader = csv.DictReader(req_stream)
-        for row in req_reader:
-            req_id_text = (row.get("request_id") or "").strip()
-            status = (row.get("status") or "PENDING").strip().upper() or "PENDING"
-            created_at = (row.get("created_at") or "").strip()
-            member_name = (row.get("member_name") or row.get("name") or "").strip()
-            phone = (row.get("phone") or "").strip() or "unknown"
-            email = (row.get("email") or "").strip()
-            note = (row.get("note") or "").strip()
-            reject_reason = (row.get("reject_reason") or "").strip()
-            items_text = (row.get("items") or "").strip()
-            if not member_name:
-                continue
+# Statements reused for every row of a CSV import / backup restore.
+SQL_INSERT_ITEM = """
+    INSERT INTO items (item_id, item_name, unit, qty_available, unit_cost, expiry_date, is_active, image_url)
+    VALUES (?, ?, ?, CAST(? AS REAL), CAST(? AS REAL), ?, ?, ?)
+"""
+SQL_INSERT_PLACEHOLDER_ITEM = "INSERT INTO items (item_name, unit, qty_available, is_active) VALUES (?, ?, 0, 1)"
+SQL_FIND_MEMBER = "SELECT member_id FROM members WHERE email=? OR phone=? ORDER BY created_at DESC LIMIT 1"
+SQL_INSERT_MEMBER = "INSERT INTO members (name, phone, email, created_at) VALUES (?, ?, ?, ?)"
+SQL_UPDATE_MEMBER = "UPDATE members SET name=?, phone=?, email=? WHERE member_id=?"
+SQL_INSERT_REQUEST = """
+    INSERT INTO requests (request_id, member_id, status, note, reject_reason, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SQL_INSERT_REQUEST_ITEM = "INSERT INTO request_items (request_id, item_id, qty_requested) VALUES (?, ?, ?)"
+SQL_UPSERT_MANAGER = """
+    INSERT INTO managers (manager_id, username, email, password_hash, is_active, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(username) DO UPDATE SET
+        email = excluded.email,
+        password_hash = CASE WHEN excluded.password_hash = '' THEN managers.password_hash
+                             ELSE excluded.password_hash END,
+        is_active = excluded.is_active
+    RETURNING manager_id
+"""
+SQL_INSERT_STOCK_MOVEMENT = """
+    INSERT INTO stock_movements (movement_id, item_id, movement_type, qty, note, created_by, created_at)
+    VALUES (?, ?, ?, CAST(? AS REAL), ?, ?, ?)
+"""
 
-            if req_id_text.isdigit():
-                existing_req = c.execute(
-                    "SELECT request_id FROM requests WHERE request_id=?",
-                    (int(req_id_text),),
-                ).fetchone()
-                if existing_req:
-                    request_id = int(req_id_text)
-                else:
-                    request_id = None
-            else:
-                request_id = None
 
-            member_row = c.execute(
-                "SELECT member_id FROM members WHERE email=? OR phone=? ORDER BY created_at DESC LIMIT 1",
-                (email, phone),
+def csv_columns(rows, *names):
+    # Picks the named columns out of csv.reader rows (header row first) with a
+    # single itemgetter per row instead of a dict; missing columns read as "".
+    rows = iter(rows)
+    header = [h.strip() for h in next(rows, [])]
+    width = len(header)
+    getter = operator.itemgetter(*[header.index(name) if name in header else width for name in names])
+    for row in rows:
+        if not row:
+            continue
+        if len(row) <= width:
+            row += [""] * (width + 1 - len(row))
+        else:
+            row[width] = ""
+        yield getter(row)
+
+
+def defer_indexes(c: sqlite3.Connection, names: list[str], rows: list) -> list[str]:
+    # rows still includes the CSV header line.
+    if len(rows) - 1 <= BULK_IMPORT_INDEX_THRESHOLD:
+        return []
+    for name in names:
+        c.execute(f"DROP INDEX IF EXISTS {name}")
+    return names
+
+
+def rebuild_indexes(c: sqlite3.Connection, names: list[str]) -> None:
+    for name in names:
+        c.execute(INDEXES[name])
+
+
+def import_items_rows(c: sqlite3.Connection, rows: list) -> tuple[int, int]:
+    created = 0
+    updated = 0
+    for item_id_text, name, unit, qty_text, unit_cost_text, expiry_date, status, image_url in csv_columns(
+        rows, "item_id", "item_name", "unit", "qty_available", "unit_cost", "expiry_date", "status", "image_url"
+    ):
+        item_id = parse_int(item_id_text)
+        name = name.strip()
+        unit = unit.strip()
+        qty = real_param(qty_text) or 0.0
+        unit_cost = real_param(unit_cost_text)
+        expiry_date = expiry_date.strip() or None
+        is_active = parse_bool_status(status)
+        image_url = image_url.strip() or None
+        if not name or not unit:
+            continue
+        if item_id is not None:
+            existing = c.execute(
+                "SELECT item_id FROM items WHERE item_id=?",
+                (item_id,),
             ).fetchone()
-            if member_row:
-                member_id = member_row["member_id"]
-                c.execute(
-                    "UPDATE members SET name=?, phone=?, email=? WHERE member_id=?",
-                    (member_name, phone, email, member_id),
-                )
-            else:
-                c.execute(
-                    "INSERT INTO members (name, phone, email, created_at) VALUES (?, ?, ?, ?)",
-                    (member_name, phone, email, created_at or datetime.utcnow().isoformat()),
-                )
-                member_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-            if req_id_text.isdigit():
-                if request_id is None:
+            if existing:
+                if image_url is not None:
                     c.execute(
                         """
-                        INSERT INTO requests (request_id, member_id, status, note, reject_reason, created_at)
-                        VALUES (?, ?, ?, ?, ?, ?)
+                        UPDATE items
+                        SET item_name=?, unit=?, qty_available=CAST(? AS REAL), unit_cost=CAST(? AS REAL), expiry_date=?, is_active=?, image_url=?
+                        WHERE item_id=?
                         """,
-                        (
-                            int(req_id_text),
-                            member_id,
-                            status,
-                            note,
-                            reject_reason,
-                            created_at or datetime.utcnow().isoformat(),
-                        ),
+                        (name, unit, qty, unit_cost, expiry_date, is_active, image_url, item_id),
                     )
-                    request_id = int(req_id_text)
                 else:
                     c.execute(
                         """
-                        UPDATE requests
-                        SET member_id=?, status=?, note=?, reject_reason=?, created_at=?
-                        WHERE request_id=?
+                        UPDATE items
+                        SET item_name=?, unit=?, qty_available=CAST(? AS REAL), unit_cost=CAST(? AS REAL), expiry_date=?, is_active=?
+                        WHERE item_id=?
                         """,
-                        (
-                            member_id,
-                            status,
-                            note,
-                            reject_reason,
-                            created_at or datetime.utcnow().isoformat(),
-                            request_id,
-                        ),
+                        (name, unit, qty, unit_cost, expiry_date, is_active, item_id),
                     )
-                    c.execute(
-                        "DELETE FROM request_items WHERE request_id=?",
-                        (request_id,),
-                    )
-            else:
-                c.execute(
-                    """
-                    INSERT INTO requests (member_id, status, note, reject_reason, created_at)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (
-                        member_id,
-                        status,
-                        note,
-                        reject_reason,
-                        created_at or datetime.utcnow().isoformat(),
-                    ),
-                )
-                request_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-            if items_text:
-                for part in items_text.split(";"):
-                    part = part.strip()
-                    if not part:
-                        continue
-                    qty_val = 0.0
-                    name_unit = part
-                    if " x " in part:
-                        name_unit, qty_text = part.rsplit(" x ", 1)
-                        qty_val = parse_float(qty_text) or 0.0
-                    name_unit = name_unit.strip()
-                    unit = ""
-                    name = name_unit
-                    if name_unit.endswith(")") and " (" in name_unit:
-                        name, unit = name_unit.rsplit(" (", 1)
-                        unit = unit[:-1]
-                    name = name.strip()
-                    unit = unit.strip()
-                    if not name:
-                        continue
-                    item_row = c.execute(
-                        "SELECT item_id FROM items WHERE item_name=?",
-                        (name,),
-                    ).fetchone()
-                    if not item_row:
-                        c.execute(
-                            "INSERT INTO items (item_name, unit, qty_available, is_active) VALUES (?, ?, 0, 1)",
-                            (name, unit or "unit"),
-                        )
-                        item_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
-                    else:
-                        item_id = item_row["item_id"]
-                    if qty_val > 0:
-                        c.execute(
-                            "INSERT INTO request_items (request_id, item_id, qty_requested) VALUES (?, ?, ?)",
-                            (request_id, item_id, qty_val),
-                        )
-
-        mgr_stream = io.TextIOWrapper(io.BytesIO(managers_bytes), encoding="utf-8", errors="replace")
-        mgr_reader = csv.DictReader(mgr_stream)
-        for row in mgr_reader:
-            username = (row.get("username") or "").strip()
-            if not username:
+                updated += 1
                 continue
-            email = (row.get("email") or "").strip()
-            password_hash = (row.get("password_hash") or "").strip()
-            is_active = 1 if str(row.get("is_active") or "1").strip() != "0" else 0
-            created_at = (row.get("created_at") or "").strip() or datetime.utcnow().isoformat()
-            manager_id_text = (row.get("manager_id") or "").strip()
+        else:
             existing = c.execute(
-                "SELECT manager_id FROM managers WHERE username=?",
-                (username,),
+                "SELECT item_id FROM items WHERE item_name=?",
+                (name,),
             ).fetchone()
             if existing:
-                if password_hash:
-                    c.execute(
-                        """
-                        UPDATE managers
-                        SET email=?, password_hash=?, is_active=?
-                        WHERE manager_id=?
-                        """,
-                        (email, password_hash, is_active, existing["manager_id"]),
-                    )
-                else:
-                    c.execute(
-                        "UPDATE managers SET email=?, is_active=? WHERE manager_id=?",
-                        (email, is_active, existing["manager_id"]),
-                    )
-            else:
-                if manager_id_text.isdigit():
+                if image_url is not None:
                     c.execute(
                         """
-                        INSERT INTO managers (manager_id, username, email, password_hash, is_active, created_at)
-                        VALUES (?, ?, ?, ?, ?, ?)
+                        UPDATE items
+                        SET unit=?, qty_available=CAST(? AS REAL), unit_cost=CAST(? AS REAL), expiry_date=?, is_active=?, image_url=?
+                        WHERE item_id=?
                         """,
-                        (
-                            int(manager_id_text),
-                            username,
-                            email,
-                            password_hash or generate_password_hash("ChangeMe123!"),
-                            is_active,
-                            created_at,
-                        ),
+                        (unit, qty, unit_cost, expiry_date, is_active, image_url, existing["item_id"]),
                     )
                 else:
                     c.execute(
                         """
-                        INSERT INTO managers (username, email, password_hash, is_active, created_at)
-                        VALUES (?, ?, ?, ?, ?)
+                        UPDATE items
+                        SET unit=?, qty_available=CAST(? AS REAL), unit_cost=CAST(? AS REAL), expiry_date=?, is_active=?
+                        WHERE item_id=?
                         """,
-                        (
-                            username,
-                            email,
-                            password_hash or generate_password_hash("ChangeMe123!"),
-                            is_active,
-                            created_at,
-                        ),
+                        (unit, qty, unit_cost, expiry_date, is_active, existing["item_id"]),
                     )
-
-        mov_stream = io.TextIOWrapper(io.BytesIO(movements_bytes), encoding="utf-8", errors="replace")
-        mov_reader = csv.DictReader(mov_stream)
-        for row in mov_reader:
-            movement_id_text = (row.get("movement_id") or "").strip()
-            item_id_text = (row.get("item_id") or "").strip()
-            movement_type = (row.get("movement_type") or "").strip().upper()
-            qty_val = parse_float(row.get("qty"))
-            note = (row.get("note") or "").strip()
-            created_by = (row.get("created_by") or "").strip() or "manager"
-            created_at = (row.get("created_at") or "").strip() or datetime.utcnow().isoformat()
-            if not item_id_text.isdigit() or not movement_type or qty_val is None:
+                updated += 1
                 continue
-            if movement_id_text.isdigit():
-                existing = c.execute(
-                    "SELECT movement_id FROM stock_movements WHERE movement_id=?",
-                    (int(movement_id_text),),
-                ).fetchone()
-                if existing:
+        c.execute(
+            SQL_INSERT_ITEM,
+            (item_id, name, unit, qty, unit_cost, expiry_date, is_active, image_url),
+        )
+        created += 1
+    return created, updated
+
+
+def import_requests_rows(c: sqlite3.Connection, rows: list, replace_existing: bool = False) -> tuple[int, int]:
+    # Existing request ids are skipped, or overwritten (with their lines) for a backup restore.
+    # Overwriting deletes lines by request_id, so the index is only deferred otherwise.
+    deferred = [] if replace_existing else defer_indexes(c, ["idx_request_items_request"], rows)
+    default_ts = datetime.utcnow().isoformat()
+    created = 0
+    skipped = 0
+    pending_lines = []
+    pending_request_ids = set()
+    items_cache = {r["item_name"]: r["item_id"] for r in c.execute("SELECT item_id, item_name FROM items")}
+
+    def flush_lines():
+        c.executemany(SQL_INSERT_REQUEST_ITEM, pending_lines)
+        pending_lines.clear()
+        pending_request_ids.clear()
+
+    for (
+        req_id_text,
+        status,
+        created_at,
+        member_name,
+        alt_name,
+        phone,
+        email,
+        note,
+        reject_reason,
+        items_text,
+    ) in csv_columns(
+        rows, "request_id", "status", "created_at", "member_name", "name", "phone", "email", "note", "reject_reason", "items"
+    ):
+        req_id = parse_int(req_id_text)
+        status = status.strip().upper() or "PENDING"
+        created_at = created_at.strip()
+        member_name = (member_name or alt_name).strip()
+        phone = phone.strip() or "unknown"
+        email = email.strip()
+        note = note.strip()
+        reject_reason = reject_reason.strip()
+        items_text = items_text.strip()
+        if not member_name:
+            skipped += 1
+            continue
+
+        request_id = None
+        if req_id is not None:
+            existing_req = c.execute(
+                "SELECT request_id FROM requests WHERE request_id=?",
+                (req_id,),
+            ).fetchone()
+            if existing_req:
+                if not replace_existing:
+                    skipped += 1
                     continue
-                c.execute(
-                    """
-                    INSERT INTO stock_movements (movement_id, item_id, movement_type, qty, note, created_by, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        int(movement_id_text),
-                        int(item_id_text),
-                        movement_type,
-                        qty_val,
-                        note,
-                        created_by,
-                        created_at,
-                    ),
-                )
-            else:
-                c.execute(
-                    """
-                    INSERT INTO stock_movements (item_id, movement_type, qty, note, created_by, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,
-                    (int(item_id_text), movement_type, qty_val, note, created_by, created_at),
-                )
+                request_id = req_id
+
+        member_row = c.execute(SQL_FIND_MEMBER, (email, phone)).fetchone()
+        if member_row:
+            member_id = member_row["member_id"]
+            c.execute(SQL_UPDATE_MEMBER, (member_name, phone, email, member_id))
+        else:
+            member_id = c.execute(
+                SQL_INSERT_MEMBER,
+                (member_name, phone, email, created_at or default_ts),
+            ).lastrowid
+
+        if request_id is not None:
+            if request_id in pending_request_ids:
+                flush_lines()
+            c.execute(
+                """
+                UPDATE requests
+                SET member_id=?, status=?, note=?, reject_reason=?, created_at=?
+                WHERE request_id=?
+                """,
+                (
+                    member_id,
+                    status,
+                    note,
+                    reject_reason,
+                    created_at or default_ts,
+                    request_id,
+                ),
+            )
+            c.execute(
+                "DELETE FROM request_items WHERE request_id=?",
+                (request_id,),
+            )
+        else:
+            request_id = c.execute(
+                SQL_INSERT_REQUEST,
+                (
+                    req_id,
+                    member_id,
+                    status,
+                    note,
+                    reject_reason,
+                    created_at or default_ts,
+                ),
+            ).lastrowid
+
+        if items_text:
+            for part in items_text.split(";"):
+                m = REQUEST_ITEM_RE.match(part.strip())
+                if not m:
+                    continue
+                name = m["name"].strip()
+                unit = (m["unit"] or "").strip()
+                qty_val = parse_float(m["qty"]) or 0.0
+                if not name:
+                    continue
+                item_id = items_cache.get(name)
+                if item_id is None:
+                    item_id = c.execute(SQL_INSERT_PLACEHOLDER_ITEM, (name, unit or "unit")).lastrowid
+                    items_cache[name] = item_id
+                if qty_val > 0:
+                    pending_lines.append((request_id, item_id, qty_val))
+                    pending_request_ids.add(request_id)
+                    if len(pending_lines) >= IMPORT_BATCH_SIZE:
+                        flush_lines()
+        created += 1
+
+    flush_lines()
+    rebuild_indexes(c, deferred)
+    return created, skipped
+
+
+_DEFAULT_MANAGER_HASH = None
+
+
+def default_manager_password_hash() -> str:
+    # Imported managers without a password_hash get the default password; hash
+    # it once per process rather than once per row.
+    global _DEFAULT_MANAGER_HASH
+    if _DEFAULT_MANAGER_HASH is None:
+        _DEFAULT_MANAGER_HASH = generate_password_hash("ChangeMe123!")
+    return _DEFAULT_MANAGER_HASH
+
+
+def import_managers_rows(c: sqlite3.Connection, rows: list) -> tuple[int, int]:
+    default_ts = datetime.utcnow().isoformat()
+    created = 0
+    updated = 0
+    manager_ids = {r["username"]: r["manager_id"] for r in c.execute("SELECT manager_id, username FROM managers")}
+    for manager_id_text, username, email, password_hash, is_active_text, created_at in csv_columns(
+        rows, "manager_id", "username", "email", "password_hash", "is_active", "created_at"
+    ):
+        username = username.strip()
+        if not username:
+            continue
+        email = email.strip()
+        password_hash = password_hash.strip()
+        is_active = 0 if is_active_text.strip() == "0" else 1
+        created_at = created_at.strip() or default_ts
+        manager_id = parse_int(manager_id_text)
+        is_new = username not in manager_ids
+        # An existing manager keeps their stored hash when the cell is blank.
+        if is_new and not password_hash:
+            password_hash = default_manager_password_hash()
+        manager_ids[username] = c.execute(
+            SQL_UPSERT_MANAGER,
+            (manager_id, username, email, password_hash, is_active, created_at),
+        ).fetchone()[0]
+        if is_new:
+            created += 1
+        else:
+            updated += 1
+    return created, updated
+
+
+def import_stock_movements_rows(c: sqlite3.Connection, rows: list) -> tuple[int, int]:
+    # Movement ids already in the table (or earlier in the file) are skipped, not overwritten.
+    deferred = defer_indexes(c, ["idx_stock_movements_item"], rows)
+    default_ts = datetime.utcnow().isoformat()
+    seen_ids = {r[0] for r in c.execute("SELECT movement_id FROM stock_movements")}
+    staged = []
+    skipped = 0
+    for movement_id_text, item_id_text, movement_type, qty_text, note, created_by, created_at in csv_columns(
+        rows, "movement_id", "item_id", "movement_type", "qty", "note", "created_by", "created_at"
+    ):
+        movement_id = parse_int(movement_id_text)
+        item_id = parse_int(item_id_text)
+        movement_type = movement_type.strip().upper()
+        qty_val = real_param(qty_text)
+        note = note.strip()
+        created_by = created_by.strip() or "manager"
+        created_at = created_at.strip() or default_ts
+        if item_id is None or not movement_type or qty_val is None:
+            skipped += 1
+            continue
+        if movement_id is not None:
+            if movement_id in seen_ids:
+                skipped += 1
+                continue
+            seen_ids.add(movement_id)
+        staged.append((movement_id, item_id, movement_type, qty_val, note, created_by, created_at))
+    c.executemany(SQL_INSERT_STOCK_MOVEMENT, staged)
+    rebuild_indexes(c, deferred)
+    return len(staged), skipped
+
+
+def apply_backup_import(
+    items_bytes: bytes,
+    requests_bytes: bytes,
+    movements_bytes: bytes,
+    managers_bytes: bytes,
+    uploads_bytes: bytes,
+    mirror_local: bool = False,
+) -> None:
+    item_rows = list(csv.reader(io.StringIO(items_bytes.decode("utf-8", "replace"))))
+    request_rows = list(csv.reader(io.StringIO(requests_bytes.decode("utf-8", "replace"))))
+    manager_rows = list(csv.reader(io.StringIO(managers_bytes.decode("utf-8", "replace"))))
+    movement_rows = list(csv.reader(io.StringIO(movements_bytes.decode("utf-8", "replace"))))
+    c = conn()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        if mirror_local:
+            c.execute("DELETE FROM request_items")
+            c.execute("DELETE FROM requests")
+            c.execute("DELETE FROM members")
+            c.execute("DELETE FROM stock_movements")
+            c.execute("DELETE FROM items")
+            c.execute("DELETE FROM managers")
+            if os.path.isdir(UPLOAD_FOLDER):
+                for root, _, files in os.walk(UPLOAD_FOLDER):
+                    for fname in files:
+                        os.remove(os.path.join(root, fname))
 
+        import_items_rows(c, item_rows)
+        import_requests_rows(c, request_rows, replace_existing=True)
+        import_managers_rows(c, manager_rows)
+        import_stock_movements_rows(c, movement_rows)
         c.commit()
     finally:
         c.close()
@@ -4314,7 +4426,7 @@ def manager_sync_render():
                 except Exception as exc:
                     error = f"Sync failed: {exc}"
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Sync to Render</h3>
@@ -4370,7 +4482,7 @@ def manager_sync_render():
         render_base=RENDER_BASE_URL or get_setting_value("render_base_url") or session.get("render_base"),
         sync_token=PANTRY_SYNC_TOKEN or get_setting_value("sync_token") or session.get("sync_token"),
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
 
 
 @APP.route("/manager/import", methods=["GET", "POST"])
@@ -4410,340 +4522,51 @@ def manager_import():
             except Exception as exc:
                 error = f"Backup restore failed: {exc}"
         else:
-            stream = io.TextIOWrapper(csv_file.stream, encoding="utf-8", errors="replace")
-            reader = csv.DictReader(stream)
+            # newline="" is what the csv module expects (quoted fields may hold
+            # line breaks); the 1 MiB buffer cuts reads on large exports.
+            stream = io.TextIOWrapper(
+                io.BufferedReader(csv_file.stream, buffer_size=CSV_READ_BUFFER),
+                encoding="utf-8",
+                errors="replace",
+                newline="",
+            )
+            reader = csv.reader(stream)
             if import_type == "items":
-                created = 0
-                updated = 0
+                rows = list(reader)
                 c = conn()
                 try:
-                    for row in reader:
-                        item_id_text = (row.get("item_id") or "").strip()
-                        name = (row.get("item_name") or "").strip()
-                        unit = (row.get("unit") or "").strip()
-                        qty = parse_float(row.get("qty_available")) or 0.0
-                        unit_cost = parse_float(row.get("unit_cost"))
-                        expiry_date = (row.get("expiry_date") or "").strip() or None
-                        is_active = parse_bool_status(row.get("status") or "")
-                        image_url = (row.get("image_url") or "").strip() or None
-                        if not name or not unit:
-                            continue
-                        if item_id_text.isdigit():
-                            existing = c.execute(
-                                "SELECT item_id FROM items WHERE item_id=?",
-                                (int(item_id_text),),
-                            ).fetchone()
-                            if existing:
-                                if image_url is not None:
-                                    c.execute(
-                                        """
-                                        UPDATE items
-                                        SET item_name=?, unit=?, qty_available=?, unit_cost=?, expiry_date=?, is_active=?, image_url=?
-                                        WHERE item_id=?
-                                        """,
-                                        (name, unit, qty, unit_cost, expiry_date, is_active, image_url, int(item_id_text)),
-                                    )
-                                else:
-                                    c.execute(
-                                        """
-                                        UPDATE items
-                                        SET item_name=?, unit=?, qty_available=?, unit_cost=?, expiry_date=?, is_active=?
-                                        WHERE item_id=?
-                                        """,
-                                        (name, unit, qty, unit_cost, expiry_date, is_active, int(item_id_text)),
-                                    )
-                                updated += 1
-                            else:
-                                c.execute(
-                                    """
-                                    INSERT INTO items (item_id, item_name, unit, qty_available, unit_cost, expiry_date, is_active, image_url)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (int(item_id_text), name, unit, qty, unit_cost, expiry_date, is_active, image_url),
-                                )
-                                created += 1
-                        else:
-                            existing = c.execute(
-                                "SELECT item_id FROM items WHERE item_name=?",
-                                (name,),
-                            ).fetchone()
-                            if existing:
-                                if image_url is not None:
-                                    c.execute(
-                                        """
-                                        UPDATE items
-                                        SET unit=?, qty_available=?, unit_cost=?, expiry_date=?, is_active=?, image_url=?
-                                        WHERE item_id=?
-                                        """,
-                                        (unit, qty, unit_cost, expiry_date, is_active, image_url, existing["item_id"]),
-                                    )
-                                else:
-                                    c.execute(
-                                        """
-                                        UPDATE items
-                                        SET unit=?, qty_available=?, unit_cost=?, expiry_date=?, is_active=?
-                                        WHERE item_id=?
-                                        """,
-                                        (unit, qty, unit_cost, expiry_date, is_active, existing["item_id"]),
-                                    )
-                                updated += 1
-                            else:
-                                c.execute(
-                                    """
-                                    INSERT INTO items (item_name, unit, qty_available, unit_cost, expiry_date, is_active, image_url)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (name, unit, qty, unit_cost, expiry_date, is_active, image_url),
-                                )
-                                created += 1
+                    c.execute("BEGIN IMMEDIATE")
+                    created, updated = import_items_rows(c, rows)
                     c.commit()
                     message = f"Items imported. Created: {created}, Updated: {updated}."
                 finally:
                     c.close()
             elif import_type == "requests":
-                created = 0
-                skipped = 0
+                rows = list(reader)
                 c = conn()
                 try:
-                    for row in reader:
-                        req_id_text = (row.get("request_id") or "").strip()
-                        status = (row.get("status") or "PENDING").strip().upper() or "PENDING"
-                        created_at = (row.get("created_at") or "").strip()
-                        member_name = (row.get("member_name") or row.get("name") or "").strip()
-                        phone = (row.get("phone") or "").strip()
-                        email = (row.get("email") or "").strip()
-                        note = (row.get("note") or "").strip()
-                        reject_reason = (row.get("reject_reason") or "").strip()
-                        items_text = (row.get("items") or "").strip()
-
-                        if not member_name:
-                            skipped += 1
-                            continue
-
-                        if not phone:
-                            phone = "unknown"
-
-                        if req_id_text.isdigit():
-                            existing_req = c.execute(
-                                "SELECT request_id FROM requests WHERE request_id=?",
-                                (int(req_id_text),),
-                            ).fetchone()
-                            if existing_req:
-                                skipped += 1
-                                continue
-
-                        member_row = c.execute(
-                            "SELECT member_id FROM members WHERE email=? OR phone=? ORDER BY created_at DESC LIMIT 1",
-                            (email, phone),
-                        ).fetchone()
-                        if member_row:
-                            member_id = member_row["member_id"]
-                            c.execute(
-                                "UPDATE members SET name=?, phone=?, email=? WHERE member_id=?",
-                                (member_name, phone, email, member_id),
-                            )
-                        else:
-                            c.execute(
-                                "INSERT INTO members (name, phone, email, created_at) VALUES (?, ?, ?, ?)",
-                                (member_name, phone, email, created_at or datetime.utcnow().isoformat()),
-                            )
-                            member_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-                        if req_id_text.isdigit():
-                            c.execute(
-                                """
-                                INSERT INTO requests (request_id, member_id, status, note, reject_reason, created_at)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                                """,
-                                (
-                                    int(req_id_text),
-                                    member_id,
-                                    status,
-                                    note,
-                                    reject_reason,
-                                    created_at or datetime.utcnow().isoformat(),
-                                ),
-                            )
-                            request_id = int(req_id_text)
-                        else:
-                            c.execute(
-                                """
-                                INSERT INTO requests (member_id, status, note, reject_reason, created_at)
-                                VALUES (?, ?, ?, ?, ?)
-                                """,
-                                (
-                                    member_id,
-                                    status,
-                                    note,
-                                    reject_reason,
-                                    created_at or datetime.utcnow().isoformat(),
-                                ),
-                            )
-                            request_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-                        if items_text:
-                            for part in items_text.split(";"):
-                                part = part.strip()
-                                if not part:
-                                    continue
-                                qty_val = 0.0
-                                name_unit = part
-                                if " x " in part:
-                                    name_unit, qty_text = part.rsplit(" x ", 1)
-                                    qty_val = parse_float(qty_text) or 0.0
-                                name_unit = name_unit.strip()
-                                unit = ""
-                                name = name_unit
-                                if name_unit.endswith(")") and " (" in name_unit:
-                                    name, unit = name_unit.rsplit(" (", 1)
-                                    unit = unit[:-1]
-                                name = name.strip()
-                                unit = unit.strip()
-                                if not name:
-                                    continue
-                                item_row = c.execute(
-                                    "SELECT item_id FROM items WHERE item_name=?",
-                                    (name,),
-                                ).fetchone()
-                                if not item_row:
-                                    c.execute(
-                                        "INSERT INTO items (item_name, unit, qty_available, is_active) VALUES (?, ?, 0, 1)",
-                                        (name, unit or "unit"),
-                                    )
-                                    item_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
-                                else:
-                                    item_id = item_row["item_id"]
-                                if qty_val > 0:
-                                    c.execute(
-                                        "INSERT INTO request_items (request_id, item_id, qty_requested) VALUES (?, ?, ?)",
-                                        (request_id, item_id, qty_val),
-                                    )
-                        created += 1
+                    c.execute("BEGIN IMMEDIATE")
+                    created, skipped = import_requests_rows(c, rows)
                     c.commit()
                     message = f"Requests imported. Created: {created}, Skipped: {skipped}."
                 finally:
                     c.close()
             elif import_type == "managers":
-                created = 0
-                updated = 0
+                rows = list(reader)
                 c = conn()
                 try:
-                    for row in reader:
-                        username = (row.get("username") or "").strip()
-                        if not username:
-                            continue
-                        email = (row.get("email") or "").strip()
-                        password_hash = (row.get("password_hash") or "").strip()
-                        is_active = 1 if str(row.get("is_active") or "1").strip() != "0" else 0
-                        created_at = (row.get("created_at") or "").strip() or datetime.utcnow().isoformat()
-                        manager_id_text = (row.get("manager_id") or "").strip()
-                        existing = c.execute(
-                            "SELECT manager_id FROM managers WHERE username=?",
-                            (username,),
-                        ).fetchone()
-                        if existing:
-                            if password_hash:
-                                c.execute(
-                                    """
-                                    UPDATE managers
-                                    SET email=?, password_hash=?, is_active=?
-                                    WHERE manager_id=?
-                                    """,
-                                    (email, password_hash, is_active, existing["manager_id"]),
-                                )
-                            else:
-                                c.execute(
-                                    """
-                                    UPDATE managers
-                                    SET email=?, is_active=?
-                                    WHERE manager_id=?
-                                    """,
-                                    (email, is_active, existing["manager_id"]),
-                                )
-                            updated += 1
-                        else:
-                            if manager_id_text.isdigit():
-                                c.execute(
-                                    """
-                                    INSERT INTO managers (manager_id, username, email, password_hash, is_active, created_at)
-                                    VALUES (?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (
-                                        int(manager_id_text),
-                                        username,
-                                        email,
-                                        password_hash or generate_password_hash("ChangeMe123!"),
-                                        is_active,
-                                        created_at,
-                                    ),
-                                )
-                            else:
-                                c.execute(
-                                    """
-                                    INSERT INTO managers (username, email, password_hash, is_active, created_at)
-                                    VALUES (?, ?, ?, ?, ?)
-                                    """,
-                                    (
-                                        username,
-                                        email,
-                                        password_hash or generate_password_hash("ChangeMe123!"),
-                                        is_active,
-                                        created_at,
-                                    ),
-                                )
-                            created += 1
+                    c.execute("BEGIN IMMEDIATE")
+                    created, updated = import_managers_rows(c, rows)
                     c.commit()
                     message = f"Managers imported. Created: {created}, Updated: {updated}."
                 finally:
                     c.close()
             elif import_type == "stock_movements":
-                created = 0
-                skipped = 0
+                rows = list(reader)
                 c = conn()
                 try:
-                    for row in reader:
-                        movement_id_text = (row.get("movement_id") or "").strip()
-                        item_id_text = (row.get("item_id") or "").strip()
-                        movement_type = (row.get("movement_type") or "").strip().upper()
-                        qty_val = parse_float(row.get("qty"))
-                        note = (row.get("note") or "").strip()
-                        created_by = (row.get("created_by") or "").strip() or "manager"
-                        created_at = (row.get("created_at") or "").strip() or datetime.utcnow().isoformat()
-                        if not item_id_text.isdigit() or not movement_type or qty_val is None:
-                            skipped += 1
-                            continue
-                        if movement_id_text.isdigit():
-                            existing = c.execute(
-                                "SELECT movement_id FROM stock_movements WHERE movement_id=?",
-                                (int(movement_id_text),),
-                            ).fetchone()
-                            if existing:
-                                skipped += 1
-                                continue
-                            c.execute(
-                                """
-                                INSERT INTO stock_movements (movement_id, item_id, movement_type, qty, note, created_by, created_at)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
-                                """,
-                                (
-                                    int(movement_id_text),
-                                    int(item_id_text),
-                                    movement_type,
-                                    qty_val,
-                                    note,
-                                    created_by,
-                                    created_at,
-                                ),
-                            )
-                        else:
-                            c.execute(
-                                """
-                                INSERT INTO stock_movements (item_id, movement_type, qty, note, created_by, created_at)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                                """,
-                                (int(item_id_text), movement_type, qty_val, note, created_by, created_at),
-                            )
-                        created += 1
+                    c.execute("BEGIN IMMEDIATE")
+                    created, skipped = import_stock_movements_rows(c, rows)
                     c.commit()
                     message = f"Stock movements imported. Created: {created}, Skipped: {skipped}."
                 finally:
@@ -4758,7 +4581,7 @@ def manager_import():
             else:
                 error = "Unknown import type."
 
-    body = render_template_string(
+    body = render_inline(
         """
         <div class="card">
           <h3>Import Data</h3>
@@ -4802,76 +4625,104 @@ def manager_import():
         message=message,
         error=error,
     )
-    return render_template_string(BASE, body=body)
+    return render_page(body)
+
+
+# Header columns repeat on every line row; a request with no lines still comes
+# back as one row with NULL line columns.
+SQL_REVIEW_REQUEST = """
+    SELECT r.request_id, r.status, r.note, r.created_at, m.name AS member_name, m.phone, m.email,
+           l.request_item_id, l.item_name, l.unit, printf('%.2f', l.qty_requested) AS want_fmt,
+           printf('%.2f', l.qty_available) AS available_fmt,
+           CASE
+               WHEN COALESCE(l.is_active, 0) != 1 THEN 'INACTIVE ITEM'
+               WHEN l.qty_requested > l.qty_available THEN 'INSUFFICIENT STOCK'
+               ELSE 'OK'
+           END AS status_text,
+           (COALESCE(l.is_active, 0) != 1 OR l.qty_requested > l.qty_available) AS has_issue
+    FROM requests r
+    JOIN members m ON m.member_id = r.member_id
+    LEFT JOIN (
+        SELECT ri.request_id, ri.request_item_id, COALESCE(ri.qty_requested, 0.0) AS qty_requested,
+               i.item_name, i.unit, COALESCE(i.qty_available, 0.0) AS qty_available, i.is_active
+        FROM request_items ri
+        JOIN items i ON i.item_id = ri.item_id
+    ) l ON l.request_id = r.request_id
+    WHERE r.request_id=?
+    ORDER BY l.item_name
+"""
 
 
 @APP.route("/manager/review/<int:req_id>")
 @requires_manager_auth
 def manager_review_request(req_id: int):
-
     c = conn()
+    try:
+        lines = c.execute(SQL_REVIEW_REQUEST, (req_id,)).fetchall()
+    finally:
+        c.close()
 
-    req = c.execute("""
-        SELECT request_id, member_name, phone, email, notes, status, created_at
-        FROM requests
-        WHERE request_id=?
-    """, (req_id,)).fetchone()
+    if not lines:
+        body = render_inline(
+            "<h2>Request not found</h2><p>No request with ID {{ req_id }}.</p>",
+            req_id=req_id,
+        )
+        return render_page(body), 404
+    req = lines[0]
+
+    # The page is a pure function of these rows (live stock included) and the
+    # layout frame, so a reviewer refreshing an unchanged request gets a 304
+    # without re-rendering or re-sending the page.
+    head, tail = base_frame()
+    etag = hashlib.md5(
+        repr((head, tail, [tuple(ln) for ln in lines])).encode(), usedforsecurity=False
+    ).hexdigest()
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "private, no-cache"
+        return resp
+
+    # A request with no lines still comes back as one row with NULL line columns
+    if req["request_item_id"] is None:
+        lines = []
+    has_issue = any(ln["has_issue"] for ln in lines)
+
+    resp = stream_page(
+        """
+        <h2>Review Request #{{ req.request_id }} — {{ req.status }}</h2>
+        <p><a href="/manager/requests">← Back to Approvals</a></p>
 
-    if not req:
-        body = f"<h2>Request not found</h2><p>No request with ID {req_id}.</p>"
-        return render_template_string(BASE, body=body), 404
+        <p><b>Member:</b> {{ req.member_name }} | <b>Phone:</b> {{ req.phone }} | <b>Email:</b> {{ req.email }}</p>
+        <p><b>Created:</b> {{ req.created_at or "" }}</p>
+        <p><b>Notes:</b> {{ req.note or "" }}</p>
 
-    lines = c.execute("""
-        SELECT rl.request_line_id, rl.item_id, rl.qty, i.item_name, i.unit, i.qty AS stock_qty, i.is_active
-        FROM request_lines rl
-        JOIN items i ON i.item_id = rl.item_id
-        WHERE rl.request_id=?
-        ORDER BY i.item_name
-    """, (req_id,)).fetchall()
+        {% if has_issue and req.status == "PENDING" %}
+          <p style="color:#b00;"><b>Warning:</b> Some items are inactive or have insufficient stock. Approval will be blocked until fixed.</p>
+        {% endif %}
 
-    rows = []
-    has_issue = False
-    for ln in lines:
-        available = float(ln["stock_qty"] or 0.0)
-        want = float(ln["qty"] or 0.0)
-        status = "OK"
-        if ln["is_active"] != 1:
-            status = "INACTIVE ITEM"
-            has_issue = True
-        elif want > available:
-            status = "INSUFFICIENT STOCK"
-            has_issue = True
-
-        rows.append(f"""
-        <tr>
-          <td>{ln["item_name"]}</td>
-          <td>{ln["unit"]}</td>
-          <td>{want:.2f}</td>
-          <td>{available:.2f}</td>
-          <td><b>{status}</b></td>
-        </tr>
-        """)
-
-    warn = ""
-    if has_issue and req["status"] == "PENDING":
-        warn = "<p style='color:#b00;'><b>Warning:</b> Some items are inactive or have insufficient stock. Approval will be blocked until fixed.</p>"
-
-    body = f"""
-    <h2>Review Request #{req["request_id"]} — {req["status"]}</h2>
-    <p><a href="/manager/requests">← Back to Approvals</a></p>
-
-    <p><b>Member:</b> {req["member_name"]} | <b>Phone:</b> {req["phone"]} | <b>Email:</b> {req["email"]}</p>
-    <p><b>Created:</b> {req["created_at"] or ""}</p>
-    <p><b>Notes:</b> {req["notes"] or ""}</p>
-
-    {warn}
-
-    <table border="1" cellpadding="8" cellspacing="0" style="width:100%; max-width:900px;">
-      <tr><th>Item</th><th>Unit</th><th>Qty Requested</th><th>Stock Available</th><th>Check</th></tr>
-      {''.join(rows) if rows else '<tr><td colspan="5">No lines found</td></tr>'}
-    </table>
-    """
-    return render_template_string(BASE, body=body)
+        <table border="1" cellpadding="8" cellspacing="0" style="width:100%; max-width:900px;">
+          <tr><th>Item</th><th>Unit</th><th>Qty Requested</th><th>Stock Available</th><th>Check</th></tr>
+          {% for ln in lines %}
+            <tr>
+              <td>{{ ln.item_name }}</td>
+              <td>{{ ln.unit }}</td>
+              <td>{{ ln.want_fmt }}</td>
+              <td>{{ ln.available_fmt }}</td>
+              <td><b>{{ ln.status_text }}</b></td>
+            </tr>
+          {% else %}
+            <tr><td colspan="5">No lines found</td></tr>
+          {% endfor %}
+        </table>
+        """,
+        req=req,
+        lines=lines,
+        has_issue=has_issue,
+    )
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
 
 
 # ============================================================
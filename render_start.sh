@@ -13,4 +13,10 @@ if [ ! -f "$PANTRY_DB_PATH" ]; then
   python3 pantry_app.py --init-db || true
 fi
 
-exec gunicorn --bind 0.0.0.0:${PORT:-5000} pantry_app:APP
+# Threaded workers: requests mostly wait on SQLite/SMTP, and each thread
+# reuses a pooled DB connection.
+exec gunicorn --bind 0.0.0.0:${PORT:-5000} \
+  --worker-class gthread \
+  --workers "${WEB_CONCURRENCY:-2}" \
+  --threads "${PANTRY_THREADS:-8}" \
+  pantry_app:APP
@@ -1,3 +1,7 @@
 #!/usr/bin/env bash
 set -e
-exec gunicorn pantry_app:APP
+exec gunicorn --bind 0.0.0.0:${PORT:-5000} \
+  --worker-class gthread \
+  --workers "${WEB_CONCURRENCY:-2}" \
+  --threads "${PANTRY_THREADS:-8}" \
+  pantry_app:APP
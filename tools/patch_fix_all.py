@@ -1,8 +1,75 @@
 from pathlib import Path
+import ast
 import re
 
-p = Path("pantry_app.py")
-txt = p.read_text()
+# One-off source migration for pantry_app.py; it rewrites the file in place.
+# Run it explicitly (python tools/patch_fix_all.py), never import it.
+if __name__ != "__main__":
+    raise RuntimeError("tools/patch_fix_all.py is a one-off script; run it directly")
+
+WHERE_NAME_RE = re.compile(r"\bWHERE\s+name\s*=")
+ORDER_NAME_RE = re.compile(r"\bORDER\s+BY\s+name\b")
+MANAGER_STOCK_RE = re.compile(r"(?ms)^def\s+manager_stock\s*\(\)\s*:\s*\n(.*?)(?=^def\s|\Z)")
+STOCK_INSERT_RE = re.compile(r'c\.execute\(\s*"(INSERT\s+INTO\s+[^"]+)"\s*,\s*\(([^)]*)\)\s*\)', re.I)
+INSERT_COLUMNS_RE = re.compile(r"INSERT\s+INTO\s+(\w+)\s*\(([^)]+)\)\s*VALUES", re.I)
+MEMBER_REQUEST_RE = re.compile(
+    r"(?ms)^@APP\.route\(\s*['\"]/member/request['\"].*?\n^def\s+member_request\s*\(\)\s*:\s*\n(.*?)(?=^@APP\.route|^def\s|\Z)"
+)
+MEMBERS_QUERY_RE = re.compile(r"(?m)^\s*members\s*=\s*c\.execute\([^\n]*FROM\s+members[^\n]*\)\.fetchall\(\)\s*\n")
+POST_MEMBER_ID_RE = re.compile(
+    r"(?ms)if\s+request\.method\s*==\s*\"POST\"\s*:\s*\n\s*member_id\s*=\s*int\(request\.form\[\s*\"member_id\"\s*\]\)\s*"
+)
+OPTIONS_JOIN_RE = re.compile(r"(?ms)options\s*=\s*\"\"\.join\(\[.*?\]\)\s*")
+AVAILABLE_LINE_RE = re.compile(r"(?m)^\s*Available:\s*\{available:[^}]*\}\s*<br>\s*$")
+ITEMS_QUERY_RE = re.compile(r"(?m)^\s*items\s*=\s*c\.execute\(\"SELECT.*FROM items.*\"\)\.fetchall\(\)\s*$")
+ADD_NEW_RE = re.compile(r'''(?ms)
+(\s*)name\s*=\s*\(request\.form\.get\("new_name"\)\s*or\s*""\)\.strip\(\)\s*
+(.{0,4000}?)
+c\.execute\(\s*"INSERT OR IGNORE INTO items\(name,\s*unit,\s*qty_available,\s*image_url\)\s*VALUES\s*\(\?,\?,\?,\?\)"\s*,\s*\(name,\s*unit,\s*0,\s*img_url\)\s*\)\s*
+c\.execute\(\s*"UPDATE items SET qty_available = qty_available \+ \? WHERE name = \?"\s*,\s*\(qty,\s*name\)\s*\)\s*
+'''
+)
+
+
+def is_route(decorator, path: str) -> bool:
+    return (
+        isinstance(decorator, ast.Call)
+        and isinstance(decorator.func, ast.Attribute)
+        and decorator.func.attr == "route"
+        and bool(decorator.args)
+        and isinstance(decorator.args[0], ast.Constant)
+        and decorator.args[0].value == path
+    )
+
+
+def function_span(src: str, name: str, fallback_re, route: str | None = None):
+    """
+    (start, end) offsets of the top-level def `name`, taken from the parsed
+    module. With `route`, the def must carry @APP.route(route) and the span
+    starts at its first decorator. Files that don't parse yet (the reason
+    these patches exist) fall back to the regex.
+    """
+    try:
+        tree = ast.parse(src)
+    except SyntaxError:
+        m = fallback_re.search(src)
+        return (m.start(), m.end()) if m else None
+    line_starts = [0] + [i + 1 for i, ch in enumerate(src) if ch == "\n"]
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == name:
+            first = node.lineno
+            if route is not None:
+                if not any(is_route(d, route) for d in node.decorator_list):
+                    return None
+                first = node.decorator_list[0].lineno
+            end = line_starts[node.end_lineno] if node.end_lineno < len(line_starts) else len(src)
+            return line_starts[first - 1], end
+    return None
+
+
+p = Path(__file__).resolve().parent.parent / "pantry_app.py"
+src = p.read_text(encoding="utf-8")
+txt = src
 
 # ------------------------------------------------------------
 # 1) Fix manager_stock(): replace wrong columns (name, qty_available)
@@ -22,8 +89,8 @@ txt = txt.replace(
 # we will also patch the add-new-item logic properly below.
 
 # Fix any "WHERE name" / "ORDER BY name" inside items queries
-txt = re.sub(r"\bWHERE\s+name\s*=", "WHERE item_name =", txt)
-txt = re.sub(r"\bORDER\s+BY\s+name\b", "ORDER BY item_name", txt)
+txt = WHERE_NAME_RE.sub("WHERE item_name =", txt)
+txt = ORDER_NAME_RE.sub("ORDER BY item_name", txt)
 
 
 # Now patch the "Add NEW item" block inside manager_stock to:
@@ -32,22 +99,22 @@ txt = re.sub(r"\bORDER\s+BY\s+name\b", "ORDER BY item_name", txt)
 #
 # We'll locate manager_stock() function and then locate its "new_name" section.
 
-m_mgr = re.search(r"(?ms)^def\s+manager_stock\s*\(\)\s*:\s*\n(.*?)(?=^def\s|\Z)", txt)
-if not m_mgr:
+mgr_span = function_span(txt, "manager_stock", MANAGER_STOCK_RE)
+if not mgr_span:
     raise SystemExit("❌ Could not find def manager_stock()")
 
-mgr_block = m_mgr.group(0)
+mgr_block = txt[mgr_span[0]:mgr_span[1]]
 
 # Find a stock insert statement already used in manager_stock (this exists because Update Existing works)
 # Example patterns we try to capture:
 #   c.execute("INSERT INTO stock_txns (item_id, qty_change, note) VALUES (?,?,?)", (...))
-stock_ins = re.search(r'c\.execute\(\s*"(INSERT\s+INTO\s+[^"]+)"\s*,\s*\(([^)]*)\)\s*\)', mgr_block, re.I)
+stock_ins = STOCK_INSERT_RE.search(mgr_block)
 stock_sql = None
 stock_cols = None
 if stock_ins:
     stock_sql = stock_ins.group(1)
     # extract table and column list
-    mm = re.search(r"INSERT\s+INTO\s+(\w+)\s*\(([^)]+)\)\s*VALUES", stock_sql, re.I)
+    mm = INSERT_COLUMNS_RE.search(stock_sql)
     if mm:
         stock_table = mm.group(1)
         cols = [c.strip() for c in mm.group(2).split(",")]
@@ -90,14 +157,7 @@ def build_stock_intake_insert(item_id_expr: str, qty_expr: str) -> str:
 # Patch the add-new-item part by replacing the wrong block if found
 # We target the specific execute lines shown in your grep output around lines 411-427.
 
-pattern_add_new = r'''(?ms)
-(\s*)name\s*=\s*\(request\.form\.get\("new_name"\)\s*or\s*""\)\.strip\(\)\s*
-(.*?)
-c\.execute\(\s*"INSERT OR IGNORE INTO items\(name,\s*unit,\s*qty_available,\s*image_url\)\s*VALUES\s*\(\?,\?,\?,\?\)"\s*,\s*\(name,\s*unit,\s*0,\s*img_url\)\s*\)\s*
-c\.execute\(\s*"UPDATE items SET qty_available = qty_available \+ \? WHERE name = \?"\s*,\s*\(qty,\s*name\)\s*\)\s*
-'''
-
-m_add = re.search(pattern_add_new, mgr_block)
+m_add = ADD_NEW_RE.search(mgr_block)
 if m_add:
     indent = m_add.group(1)
 
@@ -133,8 +193,8 @@ if m_add:
 {build_stock_intake_insert("row['item_id']", "qty").rstrip()}
 """
 
-    mgr_block2 = re.sub(pattern_add_new, replacement, mgr_block)
-    txt = txt[:m_mgr.start()] + mgr_block2 + txt[m_mgr.end():]
+    mgr_block2 = ADD_NEW_RE.sub(replacement, mgr_block)
+    txt = txt[:mgr_span[0]] + mgr_block2 + txt[mgr_span[1]:]
 else:
     # If we didn't match exact old block, at least fix obvious SQL occurrences
     txt = txt.replace("INSERT OR IGNORE INTO items(name,", "INSERT OR IGNORE INTO items(item_name,")
@@ -150,22 +210,17 @@ else:
 #    - on POST, create member record automatically and use member_id
 # ------------------------------------------------------------
 
-m_mem = re.search(r"(?ms)^@APP\.route\(\s*['\"]/member/request['\"].*?\n^def\s+member_request\s*\(\)\s*:\s*\n(.*?)(?=^@APP\.route|^def\s|\Z)", txt)
-if not m_mem:
+mem_span = function_span(txt, "member_request", MEMBER_REQUEST_RE, route="/member/request")
+if not mem_span:
     raise SystemExit("❌ Could not find /member/request route + member_request()")
 
-mem_block = m_mem.group(0)
+mem_block = txt[mem_span[0]:mem_span[1]]
 
 # 2a) Remove members dropdown query and use only items query
-mem_block = re.sub(
-    r"(?m)^\s*members\s*=\s*c\.execute\([^\n]*FROM\s+members[^\n]*\)\.fetchall\(\)\s*\n",
-    "",
-    mem_block
-)
+mem_block = MEMBERS_QUERY_RE.sub("", mem_block)
 
 # 2b) Replace POST member_id logic with typed name+phone -> insert member -> get member_id
-mem_block = re.sub(
-    r"(?ms)if\s+request\.method\s*==\s*\"POST\"\s*:\s*\n\s*member_id\s*=\s*int\(request\.form\[\s*\"member_id\"\s*\]\)\s*",
+mem_block = POST_MEMBER_ID_RE.sub(
     """if request.method == "POST":
         member_name = (request.form.get("member_name") or "").strip()
         member_phone = (request.form.get("member_phone") or "").strip()
@@ -193,18 +248,10 @@ mem_block = re.sub(
 )
 
 # 2c) Remove options dropdown building and replace with blank
-mem_block = re.sub(
-    r"(?ms)options\s*=\s*\"\"\.join\(\[.*?\]\)\s*",
-    "options = ''",
-    mem_block
-)
+mem_block = OPTIONS_JOIN_RE.sub("options = ''", mem_block)
 
 # 2d) Hide "Available:" text in the cards (remove that line)
-mem_block = re.sub(
-    r"(?m)^\s*Available:\s*\{available:[^}]*\}\s*<br>\s*$",
-    "",
-    mem_block
-)
+mem_block = AVAILABLE_LINE_RE.sub("", mem_block)
 mem_block = mem_block.replace("Available: {available:.0f}", "")
 
 # 2e) Replace the member dropdown HTML with Name + Phone inputs
@@ -215,8 +262,7 @@ mem_block = mem_block.replace(
 )
 
 # 2f) Ensure items are filtered to in-stock only (you already did, but enforce)
-mem_block = re.sub(
-    r"(?m)^\s*items\s*=\s*c\.execute\(\"SELECT.*FROM items.*\"\)\.fetchall\(\)\s*$",
+mem_block = ITEMS_QUERY_RE.sub(
     '    items = c.execute("SELECT item_id, item_name, unit, image_url FROM items WHERE is_active=1 ORDER BY item_name").fetchall()',
     mem_block
 )
@@ -225,7 +271,11 @@ if "items = [it for it in items" not in mem_block:
     mem_block = mem_block.replace("stock = get_stock_map()", "stock = get_stock_map()\n    items = [it for it in items if stock.get(it['item_id'], 0.0) > 0]")
 
 # 2g) Update the function back into the file
-txt = txt[:m_mem.start()] + mem_block + txt[m_mem.end():]
+txt = txt[:mem_span[0]] + mem_block + txt[mem_span[1]:]
 
-p.write_text(txt)
-print("✅ Patch applied successfully.")
+# Leave the file (and its mtime) alone on re-runs that change nothing
+if txt != src:
+    p.write_text(txt, encoding="utf-8")
+    print("✅ Patch applied successfully.")
+else:
+    print("ℹ️ No changes made (pantry_app.py already looks patched).")
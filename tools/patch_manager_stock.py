@@ -1,10 +1,19 @@
 import re
 from pathlib import Path
 
-p = Path("pantry_app.py")
+# One-off source migration for pantry_app.py; it rewrites the file in place.
+# Run it explicitly (python tools/patch_manager_stock.py), never import it.
+if __name__ != "__main__":
+    raise RuntimeError("tools/patch_manager_stock.py is a one-off script; run it directly")
+
+MANAGER_STOCK_RE = re.compile(r'(?ms)^def\s+manager_stock\(\):.*?(?=^@APP\.route|^def\s|\Z)')
+COMMA_CLAUSE_RE = re.compile(r',\s*(FROM|WHERE|GROUP BY|ORDER BY)\b')
+ITEMS_COMMA_WHERE_RE = re.compile(r'FROM\s+items\s*,\s*WHERE\b')
+
+p = Path(__file__).resolve().parent.parent / "pantry_app.py"
 txt = p.read_text(encoding="utf-8")
 
-m = re.search(r'(?ms)^def\s+manager_stock\(\):.*?(?=^@APP\.route|^def\s|\Z)', txt)
+m = MANAGER_STOCK_RE.search(txt)
 if not m:
     raise SystemExit("❌ Could not find def manager_stock() in pantry_app.py")
 
@@ -12,8 +21,8 @@ block = m.group(0)
 orig = block
 
 # fix SQL comma typos: ", FROM" ", WHERE" etc.
-block = re.sub(r',\s*(FROM|WHERE|GROUP BY|ORDER BY)\b', r' \1', block)
-block = re.sub(r'FROM\s+items\s*,\s*WHERE\b', r'FROM items WHERE', block)
+block = COMMA_CLAUSE_RE.sub(r' \1', block)
+block = ITEMS_COMMA_WHERE_RE.sub(r'FROM items WHERE', block)
 
 # fix wrong column name: name -> item_name (common patterns)
 repls = [
@@ -29,11 +38,8 @@ repls = [
 for a,b in repls:
     block = block.replace(a,b)
 
-# keep changes
-txt2 = txt[:m.start()] + block + txt[m.end():]
-p.write_text(txt2, encoding="utf-8")
-
 if block != orig:
+    p.write_text(txt[:m.start()] + block + txt[m.end():], encoding="utf-8")
     print("✅ Patched manager_stock() (SQL commas + name→item_name).")
 else:
     print("ℹ️ No changes made (manager_stock already looks patched).")
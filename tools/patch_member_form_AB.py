@@ -1,8 +1,20 @@
 from pathlib import Path
 import re
 
-p = Path("pantry_app.py")
-txt = p.read_text()
+# One-off source migration for pantry_app.py; it rewrites the file in place.
+# Run it explicitly (python tools/patch_member_form_AB.py), never import it.
+if __name__ != "__main__":
+    raise RuntimeError("tools/patch_member_form_AB.py is a one-off script; run it directly")
+
+ITEMS_ORDER_BY_RE = re.compile(r'FROM\s+items\s+ORDER\s+BY', re.I)
+TEMPLATE_ASSIGN_RE = re.compile(r'(?s)template\s*=\s*"""(.*?)"""')
+TEMPLATE_CALL_RE = re.compile(r'(?s)render_template_string\(\s*"""(.*?)"""\s*,')
+MEMBER_ROUTE_RE = re.compile(r'@APP\.route\(\s*[\'"]/member/request[\'"]')
+FUNC_DEF_RE = re.compile(r'\ndef\s+([a-zA-Z_]\w*)\s*\(')
+ROUTE_DECORATOR_RE = re.compile(r'(?m)^@APP\.route\(')
+
+p = Path(__file__).resolve().parent.parent / "pantry_app.py"
+txt = p.read_text(encoding="utf-8")
 
 # ---------- helpers ----------
 def replace_items_query(fn_block: str) -> str:
@@ -11,12 +23,7 @@ def replace_items_query(fn_block: str) -> str:
     SELECT ... FROM items WHERE qty_available > 0 ORDER BY ...
     """
     # common patterns: "... FROM items ORDER BY name"
-    fn_block2 = re.sub(
-        r'FROM\s+items\s+ORDER\s+BY',
-        'FROM items WHERE qty_available > 0 ORDER BY',
-        fn_block,
-        flags=re.I
-    )
+    fn_block2 = ITEMS_ORDER_BY_RE.sub('FROM items WHERE qty_available > 0 ORDER BY', fn_block)
     # if they already have WHERE, leave it
     return fn_block2
 
@@ -143,19 +150,19 @@ CARD_TEMPLATE = """template = \"\"\"\
 \"\"\""""
 
 def replace_template(fn_block: str) -> str:
-    """
+    '''
     Replace member request template with card grid template.
     Supports:
       1) template = """ ... """
       2) render_template_string(""" ... """, ...)
-    """
+    '''
     # Case 1: template = """..."""
-    m = re.search(r'(?s)template\s*=\s*"""(.*?)"""', fn_block)
+    m = TEMPLATE_ASSIGN_RE.search(fn_block)
     if m:
         return fn_block[:m.start()] + CARD_TEMPLATE + fn_block[m.end():]
 
     # Case 2: render_template_string("""...""", ...)
-    m2 = re.search(r'(?s)render_template_string\(\s*"""(.*?)"""\s*,', fn_block)
+    m2 = TEMPLATE_CALL_RE.search(fn_block)
     if m2:
         # Replace just the """...""" part, keep args after comma
         before = fn_block[:m2.start()]
@@ -166,12 +173,11 @@ def replace_template(fn_block: str) -> str:
     raise SystemExit("❌ Could not find the member request HTML template block to replace.")
 
 # ---------- locate /member/request function ----------
-route_pat = r'@APP\.route\(\s*[\'"]/member/request[\'"]'
-rm = re.search(route_pat, txt)
+rm = MEMBER_ROUTE_RE.search(txt)
 if not rm:
     raise SystemExit("❌ Could not find route decorator for /member/request")
 
-fm = re.search(r'\ndef\s+([a-zA-Z_]\w*)\s*\(', txt[rm.end():])
+fm = FUNC_DEF_RE.search(txt, rm.end())
 if not fm:
     raise SystemExit("❌ Could not find function after /member/request")
 func_name = fm.group(1)
@@ -180,8 +186,8 @@ start = re.search(rf'(?m)^def\s+{re.escape(func_name)}\s*\(', txt)
 if not start:
     raise SystemExit("❌ Could not locate member_request function start")
 
-next_route = re.search(r'(?m)^@APP\.route\(', txt[start.start()+1:])
-end = (start.start()+1 + next_route.start()) if next_route else len(txt)
+next_route = ROUTE_DECORATOR_RE.search(txt, start.start()+1)
+end = next_route.start() if next_route else len(txt)
 
 fn_block = txt[start.start():end]
 
@@ -189,7 +195,8 @@ fn_block = txt[start.start():end]
 fn_block = replace_items_query(fn_block)
 fn_block = replace_template(fn_block)
 
-txt_new = txt[:start.start()] + fn_block + txt[end:]
-p.write_text(txt_new)
-
-print("✅ Applied A+B to /member/request (card layout + hide out-of-stock).")
+if fn_block != txt[start.start():end]:
+    p.write_text(txt[:start.start()] + fn_block + txt[end:], encoding="utf-8")
+    print("✅ Applied A+B to /member/request (card layout + hide out-of-stock).")
+else:
+    print("ℹ️ No changes made (/member/request already looks patched).")